@@ -4,20 +4,27 @@ import os
 import sys
 import openvino_genai as ov_genai  
 from Managers.llm_manager import LlmManager
+from Managers.prompt_prefix_manager import join_prompt
 from Utils.model_utils import streamer
 
 ## Qt should be imported  after openvino_genai to avoid conflicts
 import PyQt5
 import PyQt5.QtWidgets
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QTextCursor
 from Gui.out_log import OutLog
 
 class LlmChatWindow(PyQt5.QtWidgets.QMainWindow):
     def __init__(self, pipe: ov_genai.LLMPipeline, 
-                 generation_config: ov_genai.GenerationConfig,  parent=None):
+                 generation_config: ov_genai.GenerationConfig,  parent=None, prompt_prefix="", engine=None):
         super().__init__(parent)
-        self.set_pipe(pipe)
+        self.engine = engine
+        self.stream = None
+        self.out_log = None
+        if not self.engine:
+            self.set_pipe(pipe)
         self.set_generation_config(generation_config)
+        self.set_prompt_prefix(prompt_prefix)
         self.setWindowTitle("LLM Chat")
         self.setGeometry(300, 300, 800, 600)
         self.init_ui()
@@ -29,6 +36,12 @@ class LlmChatWindow(PyQt5.QtWidgets.QMainWindow):
             return
         logging.info("Pipeline set successfully.")
 
+    def set_engine(self, engine):
+        # Requests of the chat are generated by the engine shared with other chat windows
+        self.cancel_stream()
+        self.engine = engine
+        logging.info("Engine set successfully.")
+
     def set_generation_config(self, generation_config):
         self.generation_config = generation_config
         if not self.generation_config:
@@ -36,6 +49,10 @@ class LlmChatWindow(PyQt5.QtWidgets.QMainWindow):
             return
         logging.info("Generation config set successfully.")
 
+    def set_prompt_prefix(self, prompt_prefix):
+        # Prefix prepended to every message, its KV state is reused by the pipeline prefix cache
+        self.prompt_prefix = prompt_prefix
+
 
     def init_layouts(self):
         # Main layout for the chat window
@@ -54,9 +71,37 @@ class LlmChatWindow(PyQt5.QtWidgets.QMainWindow):
         self.pompt_input.setPlaceholderText("Type your message here...")
         self.main_layout.addWidget(self.pompt_input)
         
-        # Redirect logging to the text output area
-        sys.stdout = OutLog(self.chat_output)
-        sys.stderr = sys.stdout  # Redirect stderr to the same QTextEdit        
+        # Redirect the streamer output of the plain pipeline to the text output area.
+        # The engine chats show their streams from a timer and do not redirect stdout.
+        if not self.engine:
+            self.redirect_output()
+
+    def redirect_output(self):
+        self.original_stdout = sys.stdout
+        self.original_stderr = sys.stderr
+        self.out_log = OutLog(self.chat_output)
+        sys.stdout = self.out_log
+        sys.stderr = sys.stdout  # Redirect stderr to the same QTextEdit
+
+    def restore_output(self):
+        if not self.out_log:
+            return
+        if sys.stdout is self.out_log:
+            sys.stdout = self.original_stdout
+        if sys.stderr is self.out_log:
+            sys.stderr = self.original_stderr
+        self.out_log = None
+
+    def release(self):
+        # Drop the pipeline and the engine and delete the window, so the memory of the replaced model is freed
+        self.cancel_stream()
+        self.stream_timer.stop()
+        self.stream = None
+        self.pipe = None
+        self.engine = None
+        self.restore_output()
+        self.close()
+        self.deleteLater()
 
     def init_butons(self):
         # Button for sending messages
@@ -99,15 +144,48 @@ class LlmChatWindow(PyQt5.QtWidgets.QMainWindow):
         self.chat_output.append(styled_text)
         
         
+        if self.engine:
+            self.submit_to_engine(input_text)
+            return
+
         # Generate response using the LLM pipeline
         try:
-            self.pipe.generate(input_text, self.generation_config, streamer)
+            self.pipe.generate(join_prompt(self.prompt_prefix, input_text), self.generation_config, streamer)
         except Exception as e:
             logging.error(f"Error during LLM generation: {e}")
             self.chat_output.append(f'<span style="color: red;">Error: {e}</span>')
 
+    def submit_to_engine(self, input_text):
+        # Submit the request to the engine and poll the stream, so the GUI stays responsive
+        if self.stream and not self.stream.is_finished():
+            PyQt5.QtWidgets.QMessageBox.warning(self, "Warning", "Please wait for the previous response.")
+            return
+        self.stream = self.engine.submit(join_prompt(self.prompt_prefix, input_text), self.generation_config)
+        self.stream_timer.start(50)
+
+    def on_stream_timer(self):
+        # Show the text generated by the engine since the previous poll
+        text = self.stream.read_available()
+        if text:
+            self.chat_output.moveCursor(QTextCursor.End)
+            self.chat_output.insertPlainText(text)
+            self.chat_output.ensureCursorVisible()
+        if self.stream.is_finished():
+            self.stream_timer.stop()
+            if self.stream.error:
+                logging.error(f"Error during LLM generation: {self.stream.error}")
+                self.chat_output.append(f'<span style="color: red;">Error: {self.stream.error}</span>')
+            stats = self.engine.get_stats()
+            logging.info(f"Engine: {stats['tokens_per_second']:.1f} tokens/s, "
+                         f"{stats['active_requests']} active, {stats['waiting_requests']} waiting requests.")
+
+    def cancel_stream(self):
+        if self.stream and not self.stream.is_finished():
+            self.stream.cancel()
+
     def on_cancel_clicked(self):
         # Close the chat window
+        self.cancel_stream()
         self.close()
         logging.info("Chat window closed.")
         
@@ -123,6 +201,8 @@ class LlmChatWindow(PyQt5.QtWidgets.QMainWindow):
         self.add_text_output_ui()
         self.init_butons()
         self.combine_layouts()
+        self.stream_timer = QTimer(self)
+        self.stream_timer.timeout.connect(self.on_stream_timer)
 
         # Set the main layout for the chat window
         central_widget = PyQt5.QtWidgets.QWidget()
@@ -14,6 +14,8 @@ from PyQt5.QtGui import QCursor
 from PyQt5.QtCore import Qt
 from Gui.out_log import OutLog
 from Gui.llm_chat_window import LlmChatWindow
+from PyQt5.QtCore import QTimer
+from Managers.llm_preloader import LlmPreloader
 
 class LlmSetuWindow(PyQt5.QtWidgets.QMainWindow):
     def __init__(self, llm_manamer: LlmManager, parent=None):
@@ -21,8 +23,15 @@ class LlmSetuWindow(PyQt5.QtWidgets.QMainWindow):
         self.llm_manager = llm_manamer
         self.setWindowTitle("Setup LLM")
         self.setGeometry(100, 100, 800, 600)
-        self.init_ui()
         self.chat_window = None  # Placeholder for chat window
+        self.engine = None  # Continuous batching engine shared by the engine chat windows
+        self.engine_chat_windows = []
+        self.generation_config = None
+        self.preloader = None  # Background preload of the last-used configuration
+        self.start_when_preloaded = False
+        self.preload_status = None  # Last logged status of the preload
+        self.init_ui()
+        self.start_preload()
 
 
     def init_layouts(self):
@@ -33,6 +42,8 @@ class LlmSetuWindow(PyQt5.QtWidgets.QMainWindow):
         self.device_layout = PyQt5.QtWidgets.QHBoxLayout()
         self.compression_layout = PyQt5.QtWidgets.QHBoxLayout()
         self.temperature_layout = PyQt5.QtWidgets.QHBoxLayout()
+        self.pipeline_options_layout = PyQt5.QtWidgets.QFormLayout()
+        self.preload_layout = PyQt5.QtWidgets.QHBoxLayout()
 
         self.button_layout = PyQt5.QtWidgets.QHBoxLayout()
         self.button_layout.setContentsMargins(0, 0, 0, 0)
@@ -44,6 +55,8 @@ class LlmSetuWindow(PyQt5.QtWidgets.QMainWindow):
         self.setup_layout.addLayout(self.device_layout)
         self.setup_layout.addLayout(self.compression_layout)
         self.setup_layout.addLayout(self.temperature_layout)
+        self.setup_layout.addLayout(self.pipeline_options_layout)
+        self.setup_layout.addLayout(self.preload_layout)
         self.setup_layout.addStretch(1)  # Add stretch to fill space
         self.main_layout.addLayout(self.setup_layout)
         self.main_layout.addLayout(self.button_layout)
@@ -92,6 +105,71 @@ class LlmSetuWindow(PyQt5.QtWidgets.QMainWindow):
         # Connect slider value change to update label
         self.temperature_input.valueChanged.connect(self.update_temperature_value)
 
+    def add_pipeline_options_ui(self):
+        # KV cache precision and scheduler options, 0 (-1 for the group size) keeps the OpenVINO default
+        self.kv_cache_precision_dropdown = PyQt5.QtWidgets.QComboBox()
+        self.kv_cache_precision_dropdown.addItems(self.llm_manager.kv_cache_precisions)
+        self.pipeline_options_layout.addRow("KV Cache Precision:", self.kv_cache_precision_dropdown)
+
+        self.pipeline_option_inputs = {}
+        spin_box_options = [
+            ("dynamic_quantization_group_size", "Dynamic Quantization Group Size (-1 - default, 0 - disabled):", -1, 1024),
+            ("cache_size", "KV Cache Size (GB, 0 - default):", 0, 256),
+            ("max_num_batched_tokens", "Max Batched Tokens (0 - default):", 0, 65536),
+            ("max_num_seqs", "Max Sequences (0 - default):", 0, 1024),
+        ]
+        for name, label, minimum, maximum in spin_box_options:
+            spin_box = PyQt5.QtWidgets.QSpinBox()
+            spin_box.setRange(minimum, maximum)
+            self.pipeline_option_inputs[name] = spin_box
+            self.pipeline_options_layout.addRow(label, spin_box)
+
+        self.prefix_caching_checkbox = PyQt5.QtWidgets.QCheckBox("Enable Prefix Caching")
+        self.pipeline_options_layout.addRow(self.prefix_caching_checkbox)
+
+        # Prompt prefix prepended to every conversation, requires prefix caching
+        self.prompt_prefix_dropdown = PyQt5.QtWidgets.QComboBox()
+        self.prompt_prefix_dropdown.addItem("None", "")
+        for name in self.llm_manager.prefix_manager.get_prefix_names():
+            self.prompt_prefix_dropdown.addItem(name, name)
+        self.pipeline_options_layout.addRow("Prompt Prefix:", self.prompt_prefix_dropdown)
+
+        # Continuous batching engine shared by many chat windows
+        self.engine_mode_checkbox = PyQt5.QtWidgets.QCheckBox("Continuous Batching Engine")
+        self.pipeline_options_layout.addRow(self.engine_mode_checkbox)
+        self.max_concurrent_sequences_input = PyQt5.QtWidgets.QSpinBox()
+        self.max_concurrent_sequences_input.setRange(1, 256)
+        self.pipeline_options_layout.addRow("Max Concurrent Sequences:", self.max_concurrent_sequences_input)
+        self.update_pipeline_options_ui()
+
+    def update_pipeline_options_ui(self):
+        # Show the pipeline options of the llm manager
+        options = self.llm_manager.pipeline_options
+        self.kv_cache_precision_dropdown.setCurrentText(options["kv_cache_precision"])
+        for name, spin_box in self.pipeline_option_inputs.items():
+            spin_box.setValue(options[name])
+        self.prefix_caching_checkbox.setChecked(options["enable_prefix_caching"])
+        self.prompt_prefix_dropdown.setCurrentIndex(max(0, self.prompt_prefix_dropdown.findData(self.llm_manager.active_prefix_name)))
+        self.engine_mode_checkbox.setChecked(self.llm_manager.engine_mode)
+        self.max_concurrent_sequences_input.setValue(self.llm_manager.max_concurrent_sequences)
+
+    def apply_pipeline_options(self):
+        # Pass the selected pipeline options to the llm manager
+        self.llm_manager.set_pipeline_option("kv_cache_precision", self.kv_cache_precision_dropdown.currentText())
+        for name, spin_box in self.pipeline_option_inputs.items():
+            self.llm_manager.set_pipeline_option(name, spin_box.value())
+        self.llm_manager.set_pipeline_option("enable_prefix_caching", self.prefix_caching_checkbox.isChecked())
+        self.llm_manager.set_active_prefix(self.prompt_prefix_dropdown.currentData())
+        self.llm_manager.set_engine_mode(self.engine_mode_checkbox.isChecked(), self.max_concurrent_sequences_input.value())
+
+    def on_model_changed(self, model_id):
+        # Restore the saved profile of the selected model
+        self.llm_manager.load_profile(model_id)
+        self.device_dropdown.setCurrentText(self.llm_manager.device)
+        self.compression_dropdown.setCurrentText(self.llm_manager.active_compression_variant)
+        self.temperature_input.setValue(int(self.llm_manager.temperature * 100))
+        self.update_pipeline_options_ui()
+
     def add_text_output_ui(self):
         # Add a text output area to display model information or results
         self.text_output = PyQt5.QtWidgets.QTextEdit()
@@ -113,10 +191,14 @@ class LlmSetuWindow(PyQt5.QtWidgets.QMainWindow):
     def add_button_ui(self):
         # Add buttons for actions like "Convert Model", "Load Model", etc.
         self.ok_button = PyQt5.QtWidgets.QPushButton("Start/Restart LLM")
+        self.new_chat_button = PyQt5.QtWidgets.QPushButton("New Chat")
+        self.new_chat_button.setEnabled(False)  # Enabled when the engine is running
         self.cancel_button = PyQt5.QtWidgets.QPushButton("Cancel/Close")
         self.button_layout.addWidget(self.ok_button)
+        self.button_layout.addWidget(self.new_chat_button)
         self.button_layout.addWidget(self.cancel_button)
         self.ok_button.clicked.connect(self.on_ok_clicked)
+        self.new_chat_button.clicked.connect(self.on_new_chat_clicked)
         self.cancel_button.clicked.connect(self.on_cancel_clicked)
 
     def on_ok_clicked(self):
@@ -136,13 +218,21 @@ class LlmSetuWindow(PyQt5.QtWidgets.QMainWindow):
         self.llm_manager.active_compression_variant = selected_compression
         self.llm_manager.set_device(selected_device)
         self.llm_manager.set_temperature(selected_temperature)
+        self.apply_pipeline_options()
         if not selected_device:
             logging.error("No device selected for model inference.")
             QApplication.restoreOverrideCursor()
             return
 
-        model_path = self.llm_manager.convert_and_compress_model()
-        if not model_path or not model_path.exists(): 
+        if self.preloader and self.preloader.is_running() and self.preloader.matches(self.llm_manager.get_selection()):
+            logging.info("Preload of the selected configuration is in progress, the LLM starts when it is ready.")
+            self.start_when_preloaded = True
+            QApplication.restoreOverrideCursor()
+            return
+        preloaded_model_path, preloaded_pipe, preloaded_engine = self.take_preload()
+
+        model_path = preloaded_model_path if preloaded_model_path else self.llm_manager.convert_and_compress_model()
+        if not model_path or not self.llm_manager.model_exists(model_path): 
             logging.error("Model conversion failed.")
             QApplication.restoreOverrideCursor()
             return        
@@ -151,32 +241,167 @@ class LlmSetuWindow(PyQt5.QtWidgets.QMainWindow):
         model_size = self.llm_manager.get_model_size(model_path)
         logging.info(f"Model size: {model_size:.2f} MB")
 
-        pipe = self.llm_manager.create_pipeline(model_path)
+        self.stop_engine()
+        generation_config = ov_genai.GenerationConfig()
+        generation_config.max_new_tokens = 256
+        generation_config.temperature = selected_temperature
+        self.generation_config = generation_config
+        prompt_prefix = self.llm_manager.prefix_manager.get_prefix(self.llm_manager.active_prefix_name)
+
+        if self.llm_manager.engine_mode:
+            self.start_engine(model_path, selected_model, prompt_prefix, preloaded_engine)
+            QApplication.restoreOverrideCursor()
+            return
+
+        pipe = preloaded_pipe if preloaded_pipe else self.llm_manager.create_pipeline(model_path)
         if not pipe:
             logging.error("Failed to create pipeline. Model path may be invalid.")
             QApplication.restoreOverrideCursor()
             return
         
         logging.info(f"Pipeline created with model: {model_path} on device: {selected_device}")
-        
-        generation_config = ov_genai.GenerationConfig()
-        generation_config.max_new_tokens = 256
-        generation_config.temperature = selected_temperature
+        logging.info(f"Pipeline options: {self.llm_manager.pipeline_options}")
+        self.llm_manager.save_profile()
+        if not preloaded_pipe:
+            self.llm_manager.warm_up_prefix(pipe, model_path)
+        for chat_window in self.engine_chat_windows:
+            chat_window.release()  # The engine chats are replaced by the plain pipeline chat
+        self.engine_chat_windows = []
 
         if not self.chat_window:
-            self.chat_window = LlmChatWindow(pipe, generation_config, parent=self)
+            self.chat_window = LlmChatWindow(pipe, generation_config, parent=self, prompt_prefix=prompt_prefix)
             self.chat_window.setWindowTitle(f"LLM Chat - {selected_model}")
             self.chat_window.show()
         else:
             self.chat_window.set_pipe(pipe)
             self.chat_window.set_generation_config(generation_config)
+            self.chat_window.set_prompt_prefix(prompt_prefix)
             self.chat_window.show()
 
         QApplication.restoreOverrideCursor()  # Restore cursor to default
 
+    def start_engine(self, model_path, selected_model, prompt_prefix, preloaded_engine=None):
+        # Start the continuous batching engine and attach the engine chat windows to it
+        self.engine = preloaded_engine if preloaded_engine else self.llm_manager.create_engine(model_path)
+        if not self.engine:
+            logging.error("Failed to create engine. Model path may be invalid.")
+            return
+        logging.info(f"Engine created with model: {model_path} on device: {self.llm_manager.device}")
+        logging.info(f"Pipeline options: {self.llm_manager.pipeline_options}")
+        self.llm_manager.save_profile()
+        if not preloaded_engine:
+            self.llm_manager.warm_up_engine_prefix(self.engine, model_path)
+        self.new_chat_button.setEnabled(True)
+
+        if self.chat_window:
+            self.chat_window.release()  # The plain pipeline chat is replaced by the engine chats
+            self.chat_window = None
+        if not self.engine_chat_windows:
+            self.on_new_chat_clicked()
+        for chat_window in self.engine_chat_windows:
+            chat_window.set_engine(self.engine)
+            chat_window.set_generation_config(self.generation_config)
+            chat_window.set_prompt_prefix(prompt_prefix)
+            chat_window.show()
+
+    def stop_engine(self):
+        if not self.engine:
+            return
+        self.engine.stop()
+        self.engine = None
+        self.new_chat_button.setEnabled(False)
+
+    def on_new_chat_clicked(self):
+        # Open one more chat window sharing the engine
+        if not self.engine:
+            logging.error("Engine is not running. Enable the continuous batching engine and start the LLM.")
+            return
+        prompt_prefix = self.llm_manager.prefix_manager.get_prefix(self.llm_manager.active_prefix_name)
+        chat_window = LlmChatWindow(None, self.generation_config, parent=self, prompt_prefix=prompt_prefix, engine=self.engine)
+        chat_window.setWindowTitle(f"LLM Chat {len(self.engine_chat_windows) + 1} - {self.llm_manager.active_model_id}")
+        chat_window.show()
+        self.engine_chat_windows.append(chat_window)
+
+    def add_preload_status_ui(self):
+        # Status of the background preload of the last-used configuration
+        self.preload_status_label = PyQt5.QtWidgets.QLabel("Preload: Idle")
+        self.preload_layout.addWidget(self.preload_status_label)
+        self.preload_timer = QTimer(self)
+        self.preload_timer.timeout.connect(self.on_preload_timer)
+
+    def start_preload(self):
+        # Preload and warm up the last-used configuration in the background
+        last_used_model = self.llm_manager.get_last_used_model()
+        if not last_used_model:
+            logging.info("No last-used configuration to preload.")
+            return
+        self.model_dropdown.setCurrentText(last_used_model)  # Loads the model profile
+        self.preloader = LlmPreloader(self.llm_manager)
+        self.preloader.start()
+        self.preload_timer.start(200)
+        # Another selection or other pipeline options cancel the preload
+        self.model_dropdown.currentTextChanged.connect(self.cancel_preload)
+        self.device_dropdown.currentTextChanged.connect(self.cancel_preload)
+        self.compression_dropdown.currentTextChanged.connect(self.cancel_preload)
+        self.kv_cache_precision_dropdown.currentTextChanged.connect(self.cancel_preload)
+        for spin_box in self.pipeline_option_inputs.values():
+            spin_box.valueChanged.connect(self.cancel_preload)
+        self.prefix_caching_checkbox.toggled.connect(self.cancel_preload)
+        self.prompt_prefix_dropdown.currentIndexChanged.connect(self.cancel_preload)
+        self.engine_mode_checkbox.toggled.connect(self.cancel_preload)
+        self.max_concurrent_sequences_input.valueChanged.connect(self.cancel_preload)
+
+    def on_preload_timer(self):
+        # Show the preload status and start the LLM if it was requested during the preload
+        if not self.preloader:
+            self.preload_timer.stop()
+            return
+        # The preload thread does not log, its status is logged from the GUI thread
+        status = self.preloader.status
+        if status != self.preload_status:
+            self.preload_status = status
+            selection = self.preloader.selection
+            logging.info(f"Preload of {selection['model_id']} on {selection['device']}: {status}")
+            if self.preloader.error:
+                logging.error(f"Preload failed: {self.preloader.error}")
+        self.preload_status_label.setText(f"Preload: {status}")
+        if self.preloader.is_running():
+            return
+        self.preload_timer.stop()
+        if self.start_when_preloaded:
+            self.start_when_preloaded = False
+            self.on_ok_clicked()
+
+    def cancel_preload(self):
+        if not self.preloader:
+            return
+        if self.preloader.is_running() or self.preloader.is_ready():
+            # A running stage finishes in the background and its result is released
+            self.preloader.cancel()
+            self.preload_status_label.setText("Preload: Cancelled")
+        self.start_when_preloaded = False
+        self.preloader = None
+
+    def take_preload(self):
+        # Use the preloaded pipeline if it was created for the current selection
+        if not self.preloader:
+            return None, None, None
+        if not self.preloader.is_ready() or not self.preloader.matches(self.llm_manager.get_selection()):
+            self.cancel_preload()
+            return None, None, None
+        model_path, pipe, engine = self.preloader.take()
+        # The prompt prefix TTFT of the warm-up is saved from the GUI thread
+        self.preloader.record_prefix_ttft(self.llm_manager, model_path)
+        self.preloader = None
+        self.preload_status_label.setText("Preload: Used")
+        logging.info(f"Using the preloaded pipeline for {model_path}.")
+        return model_path, pipe, engine
+
     def on_cancel_clicked(self):
         # Handle Cancel button click
         logging.info("Setup cancelled by user.")
+        self.cancel_preload()
+        self.stop_engine()
         self.close()
 
 
@@ -219,8 +444,12 @@ class LlmSetuWindow(PyQt5.QtWidgets.QMainWindow):
         self.add_device_selection_ui()
         self.add_compression_options_ui()  
         self.add_temperature_ui()        
+        self.add_pipeline_options_ui()
+        self.add_preload_status_ui()
         self.add_button_ui()
         self.combine_layouts()
         self.add_text_output_ui()        
+        self.model_dropdown.currentTextChanged.connect(self.on_model_changed)
+        self.on_model_changed(self.model_dropdown.currentText())
 
         logging.info("LLM Setup Window initialized.")
@@ -1,29 +1,42 @@
 import sys
 from PyQt5.QtWidgets import QTextEdit
 from PyQt5.QtGui import QTextCursor
+from PyQt5.QtCore import QObject, pyqtSignal
+
+class OutLog(QObject):
+    # Qt widgets may only be used from the GUI thread. The signal is queued when
+    # the message is written from another thread, like the preloader or the engine thread.
+    text_written = pyqtSignal(str)
 
-class OutLog:
     def __init__(self, text_edit: QTextEdit):
         """
         Initializes the OutLog with a QTextEdit widget.
         """
+        super().__init__()
         self.text_edit = text_edit
         self.original_stdout = sys.stdout # Store original stdout
+        self.text_written.connect(self.append_text)
 
     def write(self, message):
         """
-        Writes the message to the QTextEdit and ensures the cursor is at the end.
+        Writes the message to the QTextEdit from the GUI thread.
+        """
+        self.text_written.emit(message)
+
+        # Optionally, also write to the original stdout for console visibility
+        self.original_stdout.write(message)
+
+    def append_text(self, message):
+        """
+        Appends the message to the QTextEdit and ensures the cursor is at the end.
         """
         self.text_edit.moveCursor(QTextCursor.End)
         self.text_edit.insertPlainText(message)
         self.text_edit.ensureCursorVisible()
         self.text_edit.repaint()  # Ensure the text edit is updated immediately
-        
-        # Optionally, also write to the original stdout for console visibility
-        self.original_stdout.write(message) 
 
     def flush(self):
         """
         Required for file-like objects, but often no action needed for QTextEdit.
         """
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,374 @@
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+import random
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from Utils import model_utils
+from openvino_genai import LLMPipeline, ContinuousBatchingPipeline, GenerationStatus
+
+'''
+This module provides the inference backends used by the LlmManager.
+The OpenVINO backend runs the models with OpenVINO GenAI on the real devices.
+The simulated backend provides the "SIM" device, which does not need a model or hardware.
+Its prefill latency scales with the prompt length, and decode latency, jitter and failures are configurable,
+so the GUI, streaming and the rest of the stack can be tested on any machine.
+'''
+
+class LlmBackend(ABC):
+    '''Base class of the inference backends.'''
+    name = ""
+
+    @abstractmethod
+    def get_devices(self):
+        '''Get the available devices for model inference.'''
+        pass
+
+    @abstractmethod
+    def convert_and_compress_model(self, ai_id, model_id, model_dir, precision):
+        '''Prepare the model for the backend and return the model directory.'''
+        pass
+
+    @abstractmethod
+    def model_exists(self, model_path):
+        '''Check that the model prepared for the backend exists.'''
+        pass
+
+    @abstractmethod
+    def get_model_size(self, model_path):
+        '''Get the size of the model in MB.'''
+        pass
+
+    @abstractmethod
+    def get_model_hash(self, model_path):
+        '''Get the hash identifying the model.'''
+        pass
+
+    @abstractmethod
+    def create_pipeline(self, model_path, device, properties):
+        '''Create a pipeline for the model on the device with the given properties.'''
+        pass
+
+    @abstractmethod
+    def create_engine_pipeline(self, model_path, device, scheduler_config, properties):
+        '''Create a continuous batching pipeline, which generates many requests step by step.'''
+        pass
+
+
+class OpenVinoBackend(LlmBackend):
+    '''Backend running the models with OpenVINO GenAI.'''
+    name = "openvino"
+
+    def get_devices(self):
+        return model_utils.get_devives()
+
+    def convert_and_compress_model(self, ai_id, model_id, model_dir, precision):
+        return model_utils.convert_and_compress_model(ai_id, model_id, model_dir, precision, use_preconverted=True)
+
+    def model_exists(self, model_path):
+        return model_path.exists()
+
+    def get_model_size(self, model_path):
+        return model_utils.get_model_size(model_path)
+
+    def get_model_hash(self, model_path):
+        return model_utils.get_model_hash(model_path)
+
+    def create_pipeline(self, model_path, device, properties):
+        return LLMPipeline(model_path, device, **properties)
+
+    def create_engine_pipeline(self, model_path, device, scheduler_config, properties):
+        return ContinuousBatchingPipeline(model_path, scheduler_config, device, properties)
+
+
+MeanStdPair = namedtuple("MeanStdPair", ["mean", "std"])
+
+
+class SimulatedPerfMetrics:
+    '''Performance metrics of a simulated generation, in the same units as the OpenVINO GenAI metrics.'''
+    def __init__(self, num_input_tokens, num_generated_tokens, ttft, generate_duration):
+        self.num_input_tokens = num_input_tokens
+        self.num_generated_tokens = num_generated_tokens
+        self.ttft = ttft
+        self.generate_duration = generate_duration
+
+    def get_num_input_tokens(self):
+        return self.num_input_tokens
+
+    def get_num_generated_tokens(self):
+        return self.num_generated_tokens
+
+    def get_ttft(self):
+        '''Time to first token in ms.'''
+        return MeanStdPair(self.ttft * 1000, 0.0)
+
+    def get_tpot(self):
+        '''Time per output token in ms.'''
+        if self.num_generated_tokens <= 1:
+            return MeanStdPair(0.0, 0.0)
+        tpot = (self.generate_duration - self.ttft) / (self.num_generated_tokens - 1)
+        return MeanStdPair(tpot * 1000, 0.0)
+
+    def get_throughput(self):
+        '''Generated tokens per second.'''
+        if self.generate_duration <= 0:
+            return MeanStdPair(0.0, 0.0)
+        return MeanStdPair(self.num_generated_tokens / self.generate_duration, 0.0)
+
+    def get_generate_duration(self):
+        '''Generation duration in ms.'''
+        return MeanStdPair(self.generate_duration * 1000, 0.0)
+
+
+class SimulatedDecodedResults:
+    '''Result of a simulated generation for a list of prompts.'''
+    def __init__(self, texts, perf_metrics):
+        self.texts = texts
+        self.perf_metrics = perf_metrics
+
+    def __str__(self):
+        return self.texts[0] if len(self.texts) == 1 else str(self.texts)
+
+
+class SimulatedPipeline:
+    '''Pipeline simulating the generation latency of an LLM without running a model.
+    Prompts are tokenized by whitespace, the generated text is a sequence of placeholder tokens.
+    With prefix caching enabled in the scheduler config, the prefill skips the longest cached prompt prefix.
+    '''
+    def __init__(self, backend, properties):
+        self.backend = backend
+        self.properties = properties
+        scheduler_config = properties.get("scheduler_config")
+        self.prefix_caching = bool(scheduler_config and scheduler_config.enable_prefix_caching)
+        self.cached_prompts = []
+
+    def get_cached_prefix_length(self, prompt_tokens):
+        '''Get the number of prompt tokens found in the prefix cache and cache the prompt.'''
+        if not self.prefix_caching:
+            return 0
+        cached_length = 0
+        for cached_tokens in self.cached_prompts:
+            length = 0
+            for cached_token, token in zip(cached_tokens, prompt_tokens):
+                if cached_token != token:
+                    break
+                length += 1
+            cached_length = max(cached_length, length)
+        self.cached_prompts.append(prompt_tokens)
+        del self.cached_prompts[:-self.backend.max_cached_prompts]
+        return cached_length
+
+    def sleep(self, latency):
+        '''Sleep for the latency with the backend jitter applied.'''
+        jitter = self.backend.jitter
+        latency *= 1 + self.backend.random.uniform(-jitter, jitter)
+        if latency > 0:
+            time.sleep(latency)
+
+    def get_max_new_tokens(self, generation_config):
+        max_new_tokens = getattr(generation_config, "max_new_tokens", None)
+        if not max_new_tokens:
+            return self.backend.response_tokens
+        return min(max_new_tokens, self.backend.response_tokens)
+
+    def generate_text(self, prompt, generation_config, streamer):
+        '''Simulate the prefill and decode of a prompt. Returns the text and the perf metrics.'''
+        start_time = time.perf_counter()
+        prompt_tokens = prompt.split()
+        num_input_tokens = len(prompt_tokens)
+        num_prefill_tokens = num_input_tokens - self.get_cached_prefix_length(prompt_tokens)
+        self.sleep(self.backend.prefill_latency_per_token * num_prefill_tokens)
+        if self.backend.random.random() < self.backend.failure_rate:
+            raise RuntimeError("Simulated inference failure.")
+
+        tokens = []
+        ttft = 0.0
+        for i in range(self.get_max_new_tokens(generation_config)):
+            if i > 0:
+                self.sleep(self.backend.decode_latency)
+            token = f"token{i} "
+            tokens.append(token)
+            if i == 0:
+                ttft = time.perf_counter() - start_time
+            if streamer and streamer(token):
+                break
+        generate_duration = time.perf_counter() - start_time
+        perf_metrics = SimulatedPerfMetrics(num_input_tokens, len(tokens), ttft, generate_duration)
+        return "".join(tokens), perf_metrics
+
+    def generate(self, inputs, generation_config=None, streamer=None, **kwargs):
+        '''Generate a response like LLMPipeline.generate.
+        Returns a string for a string prompt and SimulatedDecodedResults for a list of prompts.
+        '''
+        if isinstance(inputs, str):
+            text, _ = self.generate_text(inputs, generation_config, streamer)
+            return text
+        texts = []
+        perf_metrics = None
+        for prompt in inputs:
+            text, perf_metrics = self.generate_text(prompt, generation_config, streamer)
+            texts.append(text)
+        return SimulatedDecodedResults(texts, perf_metrics)
+
+    def start_chat(self, system_message=""):
+        pass
+
+    def finish_chat(self):
+        pass
+
+
+class SimulatedTokenizer:
+    '''Tokenizer of the simulated pipelines, the generated token ids are the token positions.'''
+    def decode(self, token_ids):
+        return "".join(f"token{token_id} " for token_id in token_ids)
+
+
+class SimulatedGenerationOutput:
+    def __init__(self, generated_ids):
+        self.generated_ids = generated_ids
+
+
+class SimulatedGenerationHandle:
+    '''Handle of a request in the simulated continuous batching pipeline, like GenerationHandle.'''
+    def __init__(self, request_id, prompt_tokens, max_new_tokens):
+        self.request_id = request_id
+        self.prompt_tokens = prompt_tokens
+        self.max_new_tokens = max_new_tokens
+        self.num_generated_tokens = 0
+        self.unread_ids = []
+        self.status = GenerationStatus.RUNNING
+
+    def add_token(self):
+        self.unread_ids.append(self.num_generated_tokens)
+        self.num_generated_tokens += 1
+        if self.num_generated_tokens >= self.max_new_tokens:
+            self.status = GenerationStatus.FINISHED
+
+    def get_status(self):
+        return self.status
+
+    def can_read(self):
+        return bool(self.unread_ids)
+
+    def read(self):
+        '''Read the token ids generated since the previous read.'''
+        output = SimulatedGenerationOutput(self.unread_ids)
+        self.unread_ids = []
+        return {0: output}
+
+    def stop(self):
+        self.status = GenerationStatus.STOP
+
+    def cancel(self):
+        self.status = GenerationStatus.CANCEL
+
+
+class SimulatedContinuousBatchingPipeline(SimulatedPipeline):
+    '''Continuous batching pipeline simulating step by step generation of many requests.
+    Every step prefills the new requests and generates one token for every running request.
+    The decode latency of a step grows with the batch size by the backend batch decode overhead.
+    '''
+    def __init__(self, backend, scheduler_config, properties):
+        super().__init__(backend, dict(properties, scheduler_config=scheduler_config))
+        self.tokenizer = SimulatedTokenizer()
+        self.handles = []
+        self.num_steps = 0
+
+    def get_tokenizer(self):
+        return self.tokenizer
+
+    def add_request(self, request_id, prompt, generation_config):
+        handle = SimulatedGenerationHandle(request_id, prompt.split(), self.get_max_new_tokens(generation_config))
+        self.handles.append(handle)
+        return handle
+
+    def has_non_finished_requests(self):
+        return any(handle.status == GenerationStatus.RUNNING for handle in self.handles)
+
+    def step(self):
+        self.num_steps += 1
+        self.handles = [handle for handle in self.handles if handle.status == GenerationStatus.RUNNING]
+        new_handles = [handle for handle in self.handles if handle.num_generated_tokens == 0]
+        running_handles = [handle for handle in self.handles if handle.num_generated_tokens > 0]
+
+        num_prefill_tokens = 0
+        for handle in new_handles:
+            num_prefill_tokens += len(handle.prompt_tokens) - self.get_cached_prefix_length(handle.prompt_tokens)
+            if self.backend.random.random() < self.backend.failure_rate:
+                raise RuntimeError("Simulated inference failure.")
+        self.sleep(self.backend.prefill_latency_per_token * num_prefill_tokens)
+        if running_handles:
+            self.sleep(self.backend.decode_latency * (1 + self.backend.batch_decode_overhead * (len(running_handles) - 1)))
+        for handle in self.handles:
+            handle.add_token()
+
+
+class SimulatedBackend(LlmBackend):
+    '''Backend providing the simulated "SIM" device.
+    Args:
+        prefill_latency_per_token (float): Prefill latency per prompt token in seconds.
+        decode_latency (float): Latency per generated token in seconds.
+        jitter (float): Relative random deviation of the latencies, 0.1 means +-10%.
+        failure_rate (float): Probability of a generation to fail with RuntimeError.
+        response_tokens (int): Number of tokens generated when max_new_tokens does not limit the response.
+        max_cached_prompts (int): Number of prompts kept in the simulated prefix cache.
+        batch_decode_overhead (float): Relative decode latency added by every additional sequence in a batch.
+        seed (int, optional): Seed of the random generator for reproducible runs.
+    '''
+    name = "sim"
+    device = "SIM"
+
+    def __init__(self, prefill_latency_per_token=0.0005, decode_latency=0.02, jitter=0.0,
+                 failure_rate=0.0, response_tokens=128, max_cached_prompts=64,
+                 batch_decode_overhead=0.1, seed=None):
+        self.prefill_latency_per_token = prefill_latency_per_token
+        self.decode_latency = decode_latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.response_tokens = response_tokens
+        self.max_cached_prompts = max_cached_prompts
+        self.batch_decode_overhead = batch_decode_overhead
+        self.random = random.Random(seed)
+
+    def get_devices(self):
+        return [self.device]
+
+    def convert_and_compress_model(self, ai_id, model_id, model_dir, precision):
+        logging.info(f"Simulated backend does not need a model, using {model_dir} as model id.")
+        return Path(model_dir)
+
+    def model_exists(self, model_path):
+        return True
+
+    def get_model_size(self, model_path):
+        return 0.0
+
+    def get_model_hash(self, model_path):
+        return hashlib.sha256(str(model_path).encode("utf-8")).hexdigest()[:16]
+
+    def create_pipeline(self, model_path, device, properties):
+        if device != self.device:
+            logging.error(f"Device {device} is not supported by the simulated backend.")
+            return None
+        return SimulatedPipeline(self, properties)
+
+    def create_engine_pipeline(self, model_path, device, scheduler_config, properties):
+        if device != self.device:
+            logging.error(f"Device {device} is not supported by the simulated backend.")
+            return None
+        return SimulatedContinuousBatchingPipeline(self, scheduler_config, properties)
+
+
+llm_backends = {
+    OpenVinoBackend.name: OpenVinoBackend,
+    SimulatedBackend.name: SimulatedBackend,
+}
+
+
+def create_backend(name, **kwargs):
+    '''Create the inference backend by name.'''
+    if name not in llm_backends:
+        raise ValueError(f"Unknown inference backend: {name}. Available backends: {list(llm_backends)}")
+    return llm_backends[name](**kwargs)
@@ -0,0 +1,252 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from openvino_genai import GenerationStatus
+
+'''
+This module provides the LlmEngine, which serves many chat sessions and API callers with one shared
+continuous batching pipeline. Callers submit requests and get an EngineStream with the generated text.
+The engine admits the waiting requests by priority, up to the maximum number of concurrent sequences,
+and steps the pipeline in a background thread, so all admitted requests are generated together.
+'''
+
+class EngineStream:
+    '''Stream of the text generated for a request submitted to the LlmEngine.
+    Iterate over the stream to block for the text chunks, or poll read_available from a GUI timer.
+    '''
+    def __init__(self, request_id, prompt, generation_config, priority):
+        self.request_id = request_id
+        self.prompt = prompt
+        self.generation_config = generation_config
+        self.priority = priority
+        self.submit_time = time.perf_counter()
+        self.first_token_time = None
+        self.chunks = queue.Queue()
+        self.text = ""
+        # Decoding state of the engine: generated token ids, start of the decoded tail and end of the emitted tokens
+        self.token_ids = []
+        self.prefix_offset = 0
+        self.read_offset = 0
+        self.error = None
+        self.cancelled = False
+        self.finished = threading.Event()
+
+    def put(self, chunk):
+        if self.first_token_time is None:
+            self.first_token_time = time.perf_counter()
+        self.text += chunk
+        self.chunks.put(chunk)
+
+    def finish(self, error=None):
+        self.error = error
+        self.finished.set()
+        self.chunks.put(None)
+
+    def __iter__(self):
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                if self.error:
+                    raise self.error
+                return
+            yield chunk
+
+    def read_available(self):
+        '''Read the text generated since the previous read without blocking.'''
+        chunks = []
+        while True:
+            try:
+                chunk = self.chunks.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is not None:
+                chunks.append(chunk)
+        return "".join(chunks)
+
+    def is_finished(self):
+        return self.finished.is_set()
+
+    def result(self, timeout=None):
+        '''Wait for the request to finish and return the generated text.'''
+        if not self.finished.wait(timeout):
+            raise TimeoutError(f"Request {self.request_id} is not finished.")
+        if self.error:
+            raise self.error
+        return self.text
+
+    def get_ttft(self):
+        '''Time from submit to the first generated text in ms, None before the first token.'''
+        if self.first_token_time is None:
+            return None
+        return (self.first_token_time - self.submit_time) * 1000
+
+    def cancel(self):
+        '''Stop the generation of the request.'''
+        self.cancelled = True
+
+
+class LlmEngine:
+    '''Engine serving concurrent requests with one continuous batching pipeline.
+    Args:
+        pipe: Continuous batching pipeline, such as ov_genai.ContinuousBatchingPipeline.
+        max_concurrent_sequences (int): Maximum number of requests generated together.
+        aging_rate (float): Priority added per second of waiting, so low priority requests are not starved.
+        stats_window (float): Time window in seconds for the tokens/sec statistics.
+    '''
+    def __init__(self, pipe, max_concurrent_sequences=4, aging_rate=1.0, stats_window=5.0):
+        self.pipe = pipe
+        self.tokenizer = pipe.get_tokenizer()
+        self.max_concurrent_sequences = max_concurrent_sequences
+        self.aging_rate = aging_rate
+        self.stats_window = stats_window
+        self.request_ids = itertools.count()
+        self.waiting = []
+        self.active = {}
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.token_times = deque()
+        self.generated_tokens = 0
+        self.completed_requests = 0
+
+    def start(self):
+        '''Start the engine thread.'''
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="LlmEngine", daemon=True)
+        self.thread.start()
+        logging.info(f"LLM engine started, max concurrent sequences: {self.max_concurrent_sequences}")
+
+    def stop(self):
+        '''Stop the engine thread and cancel the waiting and active requests.'''
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        with self.condition:
+            for stream in self.waiting + [stream for stream, _ in self.active.values()]:
+                stream.finish(RuntimeError("LLM engine stopped."))
+            self.waiting = []
+            self.active = {}
+        logging.info("LLM engine stopped.")
+
+    def submit(self, prompt, generation_config, priority=0):
+        '''Submit a request. Requests with a higher priority are admitted first.
+        Returns:
+            EngineStream: The stream of the generated text.
+        '''
+        stream = EngineStream(next(self.request_ids), prompt, generation_config, priority)
+        with self.condition:
+            if not self.running:
+                stream.finish(RuntimeError("LLM engine is not running."))
+                return stream
+            self.waiting.append(stream)
+            self.condition.notify_all()
+        return stream
+
+    def get_effective_priority(self, stream, now):
+        return stream.priority + self.aging_rate * (now - stream.submit_time)
+
+    def admit_requests(self):
+        '''Move the waiting requests with the highest priority to the pipeline.'''
+        now = time.perf_counter()
+        self.waiting = [stream for stream in self.waiting if not self.finish_cancelled(stream)]
+        # Stable sort keeps the submit order for requests with the same priority
+        self.waiting.sort(key=lambda stream: -self.get_effective_priority(stream, now))
+        while self.waiting and len(self.active) < self.max_concurrent_sequences:
+            stream = self.waiting.pop(0)
+            handle = self.pipe.add_request(stream.request_id, stream.prompt, stream.generation_config)
+            self.active[stream.request_id] = (stream, handle)
+
+    def finish_cancelled(self, stream):
+        if not stream.cancelled:
+            return False
+        stream.finish()
+        return True
+
+    def read_outputs(self):
+        '''Pass the newly generated tokens to the streams and release the finished requests.'''
+        for request_id, (stream, handle) in list(self.active.items()):
+            if stream.cancelled:
+                handle.cancel()
+            finished = handle.get_status() != GenerationStatus.RUNNING
+            can_read = handle.can_read()
+            if can_read:
+                for output in handle.read().values():
+                    new_token_ids = list(output.generated_ids)
+                    self.record_tokens(len(new_token_ids))
+                    stream.token_ids.extend(new_token_ids)
+            if can_read or finished:
+                self.put_decoded_text(stream, finished)
+            if finished:
+                del self.active[request_id]
+                self.completed_requests += 1
+                stream.finish()
+
+    def put_decoded_text(self, stream, finished):
+        '''Pass the text of the tokens generated since the previously emitted text to the stream.
+        Only the tail from the previously emitted tokens is decoded, with the tokens before them as context,
+        so every step costs the same for long responses. The tail is held back while it ends with
+        an incomplete character (U+FFFD), so characters of several tokens are not split between chunks.
+        '''
+        prefix_text = self.tokenizer.decode(stream.token_ids[stream.prefix_offset:stream.read_offset])
+        text = self.tokenizer.decode(stream.token_ids[stream.prefix_offset:])
+        if text.endswith("\ufffd") and not finished:
+            return
+        if len(text) > len(prefix_text):
+            stream.put(text[len(prefix_text):])
+        stream.prefix_offset = stream.read_offset
+        stream.read_offset = len(stream.token_ids)
+
+    def record_tokens(self, num_tokens):
+        now = time.perf_counter()
+        self.generated_tokens += num_tokens
+        self.token_times.append((now, num_tokens))
+        while self.token_times and self.token_times[0][0] < now - self.stats_window:
+            self.token_times.popleft()
+
+    def get_stats(self):
+        '''Get the aggregate tokens/sec over the stats window and the request counts.'''
+        now = time.perf_counter()
+        token_times = [(token_time, num_tokens) for token_time, num_tokens in list(self.token_times)
+                       if token_time >= now - self.stats_window]
+        tokens_per_second = 0.0
+        if len(token_times) > 1:
+            # The first record only marks the window start, its tokens were generated before it
+            window_tokens = sum(num_tokens for _, num_tokens in token_times[1:])
+            tokens_per_second = window_tokens / (now - token_times[0][0])
+        return {
+            "tokens_per_second": tokens_per_second,
+            "generated_tokens": self.generated_tokens,
+            "active_requests": len(self.active),
+            "waiting_requests": len(self.waiting),
+            "completed_requests": self.completed_requests,
+        }
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.waiting and not self.active:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                self.admit_requests()
+            if not self.active:
+                continue
+            try:
+                self.pipe.step()
+                self.read_outputs()
+            except Exception as e:
+                logging.error(f"Error during LLM engine step: {e}")
+                # Cancel the failed requests, so the pipeline does not keep generating them
+                for stream, handle in self.active.values():
+                    handle.cancel()
+                    stream.finish(e)
+                self.active = {}
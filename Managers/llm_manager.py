@@ -4,20 +4,44 @@ import logging
 import os
 from pathlib import Path
 
-from Utils import model_utils
-from openvino_genai import LLMPipeline
+from Utils import settings_utils
+from Managers.llm_backends import LlmBackend, OpenVinoBackend
+from Managers.prompt_prefix_manager import PromptPrefixManager
+from Managers.llm_engine import LlmEngine
+from openvino_genai import LLMPipeline, SchedulerConfig
+
+# Pipeline options. Zero values and "default" keep the OpenVINO defaults.
+# Dynamic quantization group size uses -1 for the default, as 0 disables dynamic quantization.
+pipeline_option_defaults = {
+    "kv_cache_precision": "default",
+    "dynamic_quantization_group_size": -1,
+    "cache_size": 0,
+    "max_num_batched_tokens": 0,
+    "max_num_seqs": 0,
+    "enable_prefix_caching": False,
+}
+
+scheduler_option_names = ["cache_size", "max_num_batched_tokens", "max_num_seqs", "enable_prefix_caching"]
 
 class LlmManager:
-    def __init__(self):
+    def __init__(self, backend: LlmBackend | None = None):
+        self.backend = backend if backend else OpenVinoBackend()
         self.model_ids = ["DeepSeek-R1-Distill-Qwen-1.5B", "DeepSeek-R1-Distill-Qwen-7B"]
         self.active_model_id = "DeepSeek-R1-Distill-Qwen-1.5B"
         self.compression_variants = ["INT4", "INT8", "FP16"]
         self.active_compression_variant = "INT4"
         self.ai_id = "deepseek-ai"
-        self.available_devices = model_utils.get_devives()
-        self.device_preference = ["GPU", "NPU", "CPU"]
+        self.available_devices = self.backend.get_devices()
+        self.device_preference = ["GPU", "NPU", "CPU", "SIM"]
         self.device = self.select_device()
         self.temperature = 0.7
+        self.kv_cache_precisions = ["default", "u8", "f16"]
+        self.pipeline_options = dict(pipeline_option_defaults)
+        self.profiles_path = Path("llm_profiles.json")
+        self.prefix_manager = PromptPrefixManager()
+        self.active_prefix_name = ""
+        self.engine_mode = False
+        self.max_concurrent_sequences = 4
 
     def select_device(self):
         '''Select the best available device based on preference.'''
@@ -45,6 +69,164 @@ class LlmManager:
         else:
             logging.error("Temperature must be between 0 and 1.")
 
+    def set_pipeline_option(self, name, value):
+        '''Set a pipeline option such as KV cache precision or scheduler cache size.'''
+        if name not in pipeline_option_defaults:
+            logging.error(f"Unknown pipeline option: {name}")
+            return
+        if name == "kv_cache_precision":
+            if value not in self.kv_cache_precisions:
+                logging.error(f"KV cache precision must be one of {self.kv_cache_precisions}.")
+                return
+        elif name == "enable_prefix_caching":
+            value = bool(value)
+        elif name == "dynamic_quantization_group_size":
+            if not isinstance(value, int) or value < -1:
+                logging.error("Dynamic quantization group size must be -1 (default), 0 (disabled) or a group size.")
+                return
+        elif not isinstance(value, int) or value < 0:
+            logging.error(f"Pipeline option {name} must be a non-negative integer.")
+            return
+        self.pipeline_options[name] = value
+        logging.info(f"Pipeline option {name} set to: {value}")
+
+    def get_scheduler_config(self) -> SchedulerConfig | None:
+        '''Get the scheduler config for the pipeline options, None if no scheduler option is set.'''
+        if not any(self.pipeline_options[name] for name in scheduler_option_names):
+            return None
+        scheduler_config = SchedulerConfig()
+        if self.pipeline_options["cache_size"]:
+            scheduler_config.cache_size = self.pipeline_options["cache_size"]
+        if self.pipeline_options["max_num_batched_tokens"]:
+            scheduler_config.max_num_batched_tokens = self.pipeline_options["max_num_batched_tokens"]
+        if self.pipeline_options["max_num_seqs"]:
+            scheduler_config.max_num_seqs = self.pipeline_options["max_num_seqs"]
+        scheduler_config.enable_prefix_caching = self.pipeline_options["enable_prefix_caching"]
+        return scheduler_config
+
+    def get_pipeline_properties(self):
+        '''Get the properties passed to the pipeline for the pipeline options.'''
+        properties = {}
+        if self.pipeline_options["kv_cache_precision"] != "default":
+            properties["KV_CACHE_PRECISION"] = self.pipeline_options["kv_cache_precision"]
+        if self.pipeline_options["dynamic_quantization_group_size"] != -1:
+            properties["DYNAMIC_QUANTIZATION_GROUP_SIZE"] = self.pipeline_options["dynamic_quantization_group_size"]
+        scheduler_config = self.get_scheduler_config()
+        if scheduler_config:
+            properties["scheduler_config"] = scheduler_config
+        return properties
+
+    def set_engine_mode(self, engine_mode, max_concurrent_sequences=None):
+        '''Enable the continuous batching engine shared by many chat sessions.'''
+        self.engine_mode = bool(engine_mode)
+        if max_concurrent_sequences is not None:
+            if max_concurrent_sequences < 1:
+                logging.error("Max concurrent sequences must be positive.")
+            else:
+                self.max_concurrent_sequences = max_concurrent_sequences
+        logging.info(f"Engine mode set to: {self.engine_mode}, max concurrent sequences: {self.max_concurrent_sequences}")
+
+    def set_active_prefix(self, name):
+        '''Set the prompt prefix prepended to every conversation, empty name disables it.
+        Enable prefix caching with set_pipeline_option, so new conversations reuse the prefix KV state.
+        '''
+        if name and name not in self.prefix_manager.get_prefix_names():
+            logging.error(f"Prompt prefix {name} does not exist.")
+            return
+        self.active_prefix_name = name
+        logging.info(f"Prompt prefix set to: {name if name else 'None'}")
+
+    def build_prompt(self, user_input):
+        '''Prepend the active prompt prefix to the user input.'''
+        return self.prefix_manager.build_prompt(self.active_prefix_name, user_input)
+
+    def get_ttft_record_key(self, model_path):
+        '''Get the key of the prompt prefix TTFT records for the model, precision and device.'''
+        precision = self.active_compression_variant + "-" + self.pipeline_options["kv_cache_precision"]
+        return self.prefix_manager.get_ttft_record_key(self.backend.get_model_hash(model_path), precision, self.device)
+
+    def warm_up_prefix(self, pipe, model_path, record=True):
+        '''Prefill the active prompt prefix into the prefix cache, so new conversations skip the prefix prefill.'''
+        measure_ttft = lambda prompt: self.prefix_manager.measure_pipeline_ttft(pipe, prompt)
+        return self.warm_up_prefix_with(measure_ttft, model_path, record)
+
+    def warm_up_engine_prefix(self, engine, model_path, record=True):
+        '''Prefill the active prompt prefix into the prefix cache of the engine pipeline.'''
+        measure_ttft = lambda prompt: self.prefix_manager.measure_engine_ttft(engine, prompt)
+        return self.warm_up_prefix_with(measure_ttft, model_path, record)
+
+    def warm_up_prefix_with(self, measure_ttft, model_path, record=True):
+        '''Warm up the active prompt prefix with a function measuring the time to first token of a prompt.'''
+        if not self.active_prefix_name:
+            return None
+        if not self.pipeline_options["enable_prefix_caching"]:
+            logging.warning("Prefix caching is disabled, the prompt prefix KV state will not be reused.")
+        record_key = self.get_ttft_record_key(model_path)
+        return self.prefix_manager.warm_up(measure_ttft, self.active_prefix_name, record_key, record)
+
+    def save_profile(self, model_id=None):
+        '''Save the device, compression, temperature and pipeline options as the model profile.'''
+        if model_id is None:
+            model_id = self.active_model_id
+        profiles = settings_utils.load_settings(self.profiles_path)
+        profiles[model_id] = {
+            "device": self.device,
+            "compression_variant": self.active_compression_variant,
+            "temperature": self.temperature,
+            "prompt_prefix": self.active_prefix_name,
+            "engine_mode": self.engine_mode,
+            "max_concurrent_sequences": self.max_concurrent_sequences,
+            "pipeline_options": dict(self.pipeline_options),
+        }
+        profiles["last_used_model"] = model_id
+        if settings_utils.save_settings(self.profiles_path, profiles):
+            logging.info(f"Profile for {model_id} saved to {self.profiles_path}")
+
+    def get_last_used_model(self):
+        '''Get the model of the last saved profile, None if there is no saved profile.'''
+        model_id = settings_utils.load_settings(self.profiles_path).get("last_used_model")
+        return model_id if model_id in self.model_ids else None
+
+    def get_selection(self):
+        '''Get the model, device and options which define the created pipeline.'''
+        return {
+            "model_id": self.active_model_id,
+            "compression_variant": self.active_compression_variant,
+            "device": self.device,
+            "prompt_prefix": self.active_prefix_name,
+            "engine_mode": self.engine_mode,
+            "max_concurrent_sequences": self.max_concurrent_sequences,
+            "pipeline_options": dict(self.pipeline_options),
+        }
+
+    def load_profile(self, model_id=None):
+        '''Make the model active and load its profile. Returns True if a profile was found.'''
+        if model_id is None:
+            model_id = self.active_model_id
+        self.active_model_id = model_id
+        profile = settings_utils.load_settings(self.profiles_path).get(model_id)
+        if not profile:
+            logging.info(f"No saved profile for {model_id}, using defaults.")
+            self.pipeline_options = dict(pipeline_option_defaults)
+            self.active_prefix_name = ""
+            self.engine_mode = False
+            return False
+        if profile.get("device"):
+            self.set_device(profile["device"])
+        if profile.get("compression_variant") in self.compression_variants:
+            self.active_compression_variant = profile["compression_variant"]
+        if "temperature" in profile:
+            self.set_temperature(profile["temperature"])
+        self.pipeline_options = dict(pipeline_option_defaults)
+        for name, value in profile.get("pipeline_options", {}).items():
+            # Skip the options which are no longer supported
+            if name in pipeline_option_defaults:
+                self.set_pipeline_option(name, value)
+        self.set_active_prefix(profile.get("prompt_prefix", ""))
+        self.set_engine_mode(profile.get("engine_mode", False), profile.get("max_concurrent_sequences"))
+        logging.info(f"Profile for {model_id} loaded from {self.profiles_path}")
+        return True
+
     def convert_and_compress_model(self, model_id=None, compression_variant=None):
         '''Convert and compress the model to the specified precision.'''
         if model_id is None:
@@ -52,8 +234,20 @@ class LlmManager:
         if compression_variant is None:
             compression_variant = self.active_compression_variant
         
-        model_path = Path(self.active_model_id + "-" + self.active_compression_variant + "-" + self.device)
-        return model_utils.convert_and_compress_model(self.ai_id, model_id, model_path, compression_variant, use_preconverted=True)
+        model_path = self.get_model_path(model_id, compression_variant)
+        return self.backend.convert_and_compress_model(self.ai_id, model_id, model_path, compression_variant)
+
+    def get_model_path(self, model_id=None, compression_variant=None):
+        '''Get the directory of the converted model.'''
+        if model_id is None:
+            model_id = self.active_model_id
+        if compression_variant is None:
+            compression_variant = self.active_compression_variant
+        return Path(model_id + "-" + compression_variant + "-" + self.device)
+
+    def model_exists(self, model_path):
+        '''Check that the converted model exists.'''
+        return self.backend.model_exists(model_path)
     
     def get_available_models(self):
         '''Get the list of available models.'''
@@ -61,14 +255,31 @@ class LlmManager:
     
     def get_model_size(self, model_path):
         '''Get the size of the model in MB.'''
-        return model_utils.get_model_size(model_path)
+        return self.backend.get_model_size(model_path)
     
     def create_pipeline(self, model_path) -> LLMPipeline | None:
         '''Create a pipeline for the model.'''
-        if not model_path.exists():
+        if not self.model_exists(model_path):
             logging.error(f"Model path {model_path} does not exist.")
             return None
-        return LLMPipeline(model_path, self.device)
+        return self.backend.create_pipeline(model_path, self.device, self.get_pipeline_properties())
+
+    def create_engine(self, model_path) -> LlmEngine | None:
+        '''Create and start a continuous batching engine for the model.'''
+        if not self.model_exists(model_path):
+            logging.error(f"Model path {model_path} does not exist.")
+            return None
+        properties = self.get_pipeline_properties()
+        scheduler_config = properties.pop("scheduler_config", None) or SchedulerConfig()
+        # The scheduler must fit all the sequences the engine admits
+        if scheduler_config.max_num_seqs < self.max_concurrent_sequences:
+            scheduler_config.max_num_seqs = self.max_concurrent_sequences
+        pipe = self.backend.create_engine_pipeline(model_path, self.device, scheduler_config, properties)
+        if not pipe:
+            return None
+        engine = LlmEngine(pipe, self.max_concurrent_sequences)
+        engine.start()
+        return engine
     
 
     def test_hello(self):
@@ -0,0 +1,149 @@
+import copy
+import threading
+
+from openvino_genai import GenerationConfig
+
+'''
+This module provides the LlmPreloader, which creates the pipeline of the last-used configuration
+in a background thread at launch and runs a short warm-up generation, so kernels are compiled
+and caches are hot before the first prompt. The preload only uses an already converted model,
+and it can be cancelled at any time, for example when the user selects another configuration.
+The preload thread does not change the state of the LlmManager: it works on a copy, and the prompt prefix
+TTFT measured by the warm-up is recorded by the owner with record_prefix_ttft.
+'''
+
+PRELOAD_IDLE = "Idle"
+PRELOAD_CHECKING = "Checking model"
+PRELOAD_LOADING = "Creating pipeline"
+PRELOAD_WARMING_UP = "Warming up"
+PRELOAD_READY = "Ready"
+PRELOAD_NOT_AVAILABLE = "Model is not converted"
+PRELOAD_CANCELLED = "Cancelled"
+PRELOAD_FAILED = "Failed"
+
+warm_up_prompt = "Hello!"
+
+
+class LlmPreloader:
+    '''Preload of the pipeline, or of the engine in engine mode, for the current LlmManager selection.
+    Args:
+        llm_manager (LlmManager): The manager with the selection to preload. Later changes of the manager
+            do not affect the preload, compare the selection with matches() before using the result.
+        warm_up_tokens (int): Number of tokens generated by the warm-up.
+    '''
+    def __init__(self, llm_manager, warm_up_tokens=8):
+        self.llm_manager = copy.copy(llm_manager)
+        self.llm_manager.pipeline_options = dict(llm_manager.pipeline_options)
+        self.llm_manager.prefix_manager = copy.deepcopy(llm_manager.prefix_manager)
+        self.prefix_ttft_record = None
+        self.selection = self.llm_manager.get_selection()
+        self.warm_up_tokens = warm_up_tokens
+        self.status = PRELOAD_IDLE
+        self.error = None
+        self.model_path = None
+        self.pipe = None
+        self.engine = None
+        self.lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        '''Start the preload in a background thread.'''
+        self.set_status(PRELOAD_CHECKING)
+        self.thread = threading.Thread(target=self.run, name="LlmPreloader", daemon=True)
+        self.thread.start()
+
+    def is_running(self):
+        return self.status in [PRELOAD_CHECKING, PRELOAD_LOADING, PRELOAD_WARMING_UP]
+
+    def is_ready(self):
+        return self.status == PRELOAD_READY
+
+    def matches(self, selection):
+        '''Check that the preload was started for the selection.'''
+        return self.selection == selection
+
+    def cancel(self):
+        '''Cancel the preload and release the preloaded pipeline. Does not wait for the running stage.'''
+        with self.lock:
+            self.cancel_event.set()
+            if self.is_ready():
+                self.release()
+                self.set_status(PRELOAD_CANCELLED)
+
+    def take(self):
+        '''Take the preloaded model path, pipeline and engine, the caller becomes their owner.'''
+        with self.lock:
+            if not self.is_ready():
+                return None, None, None
+            model_path, pipe, engine = self.model_path, self.pipe, self.engine
+            self.pipe = None
+            self.engine = None
+            self.set_status(PRELOAD_IDLE)
+            return model_path, pipe, engine
+
+    def release(self):
+        if self.engine:
+            self.engine.stop()
+        self.engine = None
+        self.pipe = None
+
+    def set_status(self, status):
+        # Not logged, the GUI log handler must not be used from the preload thread. Poll the status instead.
+        self.status = status
+
+    def record_prefix_ttft(self, llm_manager, model_path):
+        '''Record the prompt prefix TTFT measured by the warm-up in the prefix manager of llm_manager.'''
+        if not self.prefix_ttft_record:
+            return
+        record_key = llm_manager.get_ttft_record_key(model_path)
+        llm_manager.prefix_manager.record_ttft(self.selection["prompt_prefix"], record_key, self.prefix_ttft_record)
+
+    def advance(self, status):
+        '''Move to the next preload stage. Returns False if the preload is cancelled.'''
+        with self.lock:
+            if self.cancel_event.is_set():
+                self.release()
+                self.set_status(PRELOAD_CANCELLED)
+                return False
+            self.set_status(status)
+            return True
+
+    def warm_up(self):
+        generation_config = GenerationConfig()
+        generation_config.max_new_tokens = self.warm_up_tokens
+        if self.engine:
+            self.engine.submit(warm_up_prompt, generation_config).result()
+            self.prefix_ttft_record = self.llm_manager.warm_up_engine_prefix(self.engine, self.model_path, record=False)
+            return
+        self.pipe.generate(warm_up_prompt, generation_config)
+        self.prefix_ttft_record = self.llm_manager.warm_up_prefix(self.pipe, self.model_path, record=False)
+
+    def run(self):
+        try:
+            if not self.advance(PRELOAD_CHECKING):
+                return
+            self.model_path = self.llm_manager.get_model_path()
+            if not self.llm_manager.model_exists(self.model_path):
+                self.set_status(PRELOAD_NOT_AVAILABLE)
+                return
+
+            if not self.advance(PRELOAD_LOADING):
+                return
+            if self.llm_manager.engine_mode:
+                self.engine = self.llm_manager.create_engine(self.model_path)
+            else:
+                self.pipe = self.llm_manager.create_pipeline(self.model_path)
+            if not self.pipe and not self.engine:
+                self.set_status(PRELOAD_FAILED)
+                return
+
+            if not self.advance(PRELOAD_WARMING_UP):
+                return
+            self.warm_up()
+            self.advance(PRELOAD_READY)
+        except Exception as e:
+            with self.lock:
+                self.error = e
+                self.release()
+                self.set_status(PRELOAD_FAILED)
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import time
+from pathlib import Path
+
+from Utils import settings_utils
+from openvino_genai import GenerationConfig
+
+'''
+This module provides named prompt prefixes, such as a system prompt, shared by all conversations.
+When the pipeline is created, a warm-up generation prefills the prefix into the pipeline prefix cache,
+so a new conversation skips the prefix prefill.
+OpenVINO GenAI does not export the KV cache, so the prefix KV state does not survive a restart. Only the TTFT
+records are saved to disk: the TTFT measured per (model hash, precision, device) key without and with the
+cached prefix. With an up-to-date TTFT record the warm-up skips the measurement and only prefills the prefix.
+'''
+
+deepseek_system_prompt = (
+    "You are a helpful assistant. Think through the problem step by step before answering, "
+    "then give a short and precise final answer."
+)
+
+default_prefixes = {
+    "DeepSeek-R1 assistant": deepseek_system_prompt,
+}
+
+# Questions used to measure the time to first token after the prefix
+warm_up_probes = ["Hello!", "What can you do?"]
+
+
+def join_prompt(prefix, user_input):
+    '''Prepend the prefix to the user input.'''
+    if not prefix:
+        return user_input
+    return f"{prefix}\n\n{user_input}"
+
+
+class PromptPrefixManager:
+    def __init__(self, store_path=Path("llm_prompt_prefixes.json")):
+        self.store_path = Path(store_path)
+        store = settings_utils.load_settings(self.store_path)
+        self.prefixes = store.get("prefixes", dict(default_prefixes))
+        self.ttft_records = store.get("ttft_records", {})
+
+    def save(self):
+        '''Save the prefixes and the TTFT records to disk.'''
+        store = {"prefixes": self.prefixes, "ttft_records": self.ttft_records}
+        if settings_utils.save_settings(self.store_path, store):
+            logging.info(f"Prompt prefixes saved to {self.store_path}")
+
+    def get_prefix_names(self):
+        '''Get the names of the available prefixes.'''
+        return list(self.prefixes)
+
+    def get_prefix(self, name):
+        '''Get the prefix text by name, empty if there is no such prefix.'''
+        return self.prefixes.get(name, "")
+
+    def add_prefix(self, name, text):
+        '''Add or replace a named prefix. The TTFT records of the replaced prefix become stale.'''
+        if not name or not text:
+            logging.error("Prompt prefix name and text must not be empty.")
+            return
+        self.prefixes[name] = text
+        self.save()
+
+    def remove_prefix(self, name):
+        '''Remove a named prefix and its TTFT records.'''
+        if name not in self.prefixes:
+            logging.error(f"Prompt prefix {name} does not exist.")
+            return
+        del self.prefixes[name]
+        for ttft_records in self.ttft_records.values():
+            ttft_records.pop(name, None)
+        self.save()
+
+    def build_prompt(self, name, user_input):
+        '''Prepend the named prefix to the user input.'''
+        return join_prompt(self.get_prefix(name), user_input)
+
+    @staticmethod
+    def get_ttft_record_key(model_hash, precision, device):
+        '''Get the key of the prefix TTFT records for a model, precision and device.'''
+        return f"{model_hash}-{precision}-{device}"
+
+    @staticmethod
+    def get_prefix_hash(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_ttft_record(self, name, record_key):
+        '''Get the TTFT record of the prefix for the key, None if there is no up-to-date record.'''
+        ttft_record = self.ttft_records.get(record_key, {}).get(name)
+        if not ttft_record or ttft_record["prefix_hash"] != self.get_prefix_hash(self.get_prefix(name)):
+            return None
+        return ttft_record
+
+    @staticmethod
+    def measure_pipeline_ttft(pipe, prompt):
+        '''Generate one token for the prompt with the pipeline and return the time to first token in ms.'''
+        generation_config = GenerationConfig()
+        generation_config.max_new_tokens = 1
+        return pipe.generate([prompt], generation_config).perf_metrics.get_ttft().mean
+
+    @staticmethod
+    def measure_engine_ttft(engine, prompt):
+        '''Generate one token for the prompt with the LlmEngine and return the time to first token in ms.'''
+        generation_config = GenerationConfig()
+        generation_config.max_new_tokens = 1
+        stream = engine.submit(prompt, generation_config)
+        stream.result()
+        return stream.get_ttft()
+
+    def record_ttft(self, name, record_key, ttft_record):
+        '''Record the TTFT of the prefix for the key and save it to disk.'''
+        self.ttft_records.setdefault(record_key, {})[name] = ttft_record
+        self.save()
+
+    def warm_up(self, measure_ttft, name, record_key, record=True):
+        '''Prefill the prefix into the pipeline prefix cache. Without an up-to-date TTFT record for the key,
+        measure the TTFT without and with the cached prefix and record it.
+        The pipeline must be created with prefix caching enabled.
+        Args:
+            measure_ttft (callable): Generates one token for a prompt and returns the time to first token in ms,
+                such as measure_pipeline_ttft or measure_engine_ttft bound to the pipeline.
+            name (str): The prefix name.
+            record_key (str): The key from get_ttft_record_key.
+            record (bool): Whether to record a new TTFT measurement. Pass False from a background thread
+                and record the returned TTFT with record_ttft from the owner thread.
+        Returns:
+            dict: The TTFT record with the TTFT of the first (cold) and of the following (warm) conversations in ms.
+        '''
+        prefix = self.get_prefix(name)
+        if not prefix:
+            logging.error(f"Prompt prefix {name} does not exist.")
+            return None
+        ttft_record = self.get_ttft_record(name, record_key)
+        if ttft_record:
+            measure_ttft(self.build_prompt(name, warm_up_probes[0]))
+            logging.info(f"Prompt prefix {name} prefilled, TTFT not measured. Cached TTFT record from "
+                         f"{ttft_record['updated']}: {ttft_record['ttft_cold_ms']:.1f} ms cold, "
+                         f"{ttft_record['ttft_warm_ms']:.1f} ms with the cached prefix.")
+            return ttft_record
+
+        # The first generation also includes one-off costs like kernel compilation, exclude them
+        measure_ttft(warm_up_probes[0])
+        ttft_cold = measure_ttft(self.build_prompt(name, warm_up_probes[0]))
+        ttft_warm = measure_ttft(self.build_prompt(name, warm_up_probes[1]))
+        ttft_record = {
+            "prefix_hash": self.get_prefix_hash(prefix),
+            "ttft_cold_ms": ttft_cold,
+            "ttft_warm_ms": ttft_warm,
+            "updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if record:
+            self.record_ttft(name, record_key, ttft_record)
+        logging.info(f"Prompt prefix {name} measured TTFT: {ttft_cold:.1f} ms cold, "
+                     f"{ttft_warm:.1f} ms with the cached prefix ({ttft_cold - ttft_warm:.1f} ms saved).")
+        return ttft_record
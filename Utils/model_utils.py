@@ -4,6 +4,7 @@ import os
 from pathlib import Path
 import subprocess  # nosec - disable B404:import-subprocess check
 import platform
+import hashlib
 import huggingface_hub as hf_hub
 import openvino as ov
 
@@ -144,6 +145,22 @@ def get_model_size(model_dir):
     return file_size / (1024 * 1024)  # Convert bytes to MB
         
 
+def get_model_hash(model_dir):
+    '''Get the hash of the model, based on the model topology and the size of the weights.'''
+    xml_path = model_dir / "openvino_model.xml"
+    bin_path = model_dir / "openvino_model.bin"
+    if not xml_path.exists():
+        raise FileNotFoundError(f"Model file {xml_path.name} does not exist in {model_dir}.")
+
+    model_hash = hashlib.sha256()
+    with open(xml_path, "rb") as xml_file:
+        for chunk in iter(lambda: xml_file.read(1024 * 1024), b""):
+            model_hash.update(chunk)
+    if bin_path.exists():
+        model_hash.update(str(os.path.getsize(bin_path)).encode())
+    return model_hash.hexdigest()[:16]
+
+
 def streamer(subword):
     print(subword, end="", flush=True)
     sys.stdout.flush()
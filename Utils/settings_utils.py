@@ -0,0 +1,47 @@
+import json
+import logging
+from pathlib import Path
+
+'''
+This module provides utility functions to load and save application settings,
+such as per model pipeline profiles, as JSON files.
+'''
+
+def load_settings(settings_path):
+    '''Load settings from a JSON file.
+    Args:
+        settings_path (Path): The path of the JSON settings file.
+    Returns:
+        dict: The loaded settings. Empty if the file does not exist or can not be parsed.
+    '''
+    settings_path = Path(settings_path)
+    if not settings_path.exists():
+        return {}
+    try:
+        with open(settings_path, "r", encoding="utf-8") as settings_file:
+            settings = json.load(settings_file)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.error(f"Failed to load settings from {settings_path}: {e}")
+        return {}
+    if not isinstance(settings, dict):
+        logging.error(f"Settings file {settings_path} has unexpected format.")
+        return {}
+    return settings
+
+
+def save_settings(settings_path, settings):
+    '''Save settings to a JSON file.
+    Args:
+        settings_path (Path): The path of the JSON settings file.
+        settings (dict): The settings to save.
+    Returns:
+        bool: True if the settings were saved, False otherwise.
+    '''
+    settings_path = Path(settings_path)
+    try:
+        with open(settings_path, "w", encoding="utf-8") as settings_file:
+            json.dump(settings, settings_file, indent=4)
+    except OSError as e:
+        logging.error(f"Failed to save settings to {settings_path}: {e}")
+        return False
+    return True
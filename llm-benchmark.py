@@ -0,0 +1,117 @@
+'''
+This script benchmarks the pipeline options of the LlmManager, such as KV cache precision,
+KV cache size and dynamic quantization group size.
+Every setting runs in a separate process, so the peak memory of one setting does not affect the others.
+It reports the throughput, the time to first token and the peak process memory for each setting.
+'''
+
+import argparse
+import logging
+import multiprocessing
+import sys
+import time
+
+from Managers.llm_manager import LlmManager
+from Managers.llm_backends import create_backend
+import openvino_genai as ov_genai
+
+try:
+    import resource
+except ImportError:  # resource is not available on Windows
+    resource = None
+
+benchmark_settings = {
+    "default": {},
+    "kv-u8": {"kv_cache_precision": "u8"},
+    "kv-f16": {"kv_cache_precision": "f16"},
+    "kv-u8-dq32": {"kv_cache_precision": "u8", "dynamic_quantization_group_size": 32},
+    "kv-u8-cache1gb": {"kv_cache_precision": "u8", "cache_size": 1},
+    "kv-f16-cache1gb": {"kv_cache_precision": "f16", "cache_size": 1},
+    "kv-u8-cache1gb-prefix": {"kv_cache_precision": "u8", "cache_size": 1, "enable_prefix_caching": True},
+}
+
+benchmark_prompt = "Solve the equation 2x^2 + 3x - 100 = 0 step by step and explain every step of your reasoning."
+
+
+def get_peak_memory_mb():
+    '''Get the peak resident memory of the current process in MB, None if it can not be measured.'''
+    if resource is None:
+        return None
+    # ru_maxrss is reported in KB on Linux and in bytes on macOS
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak_memory / (1024 * 1024)
+    return peak_memory / 1024
+
+
+def run_setting(args, options, results):
+    '''Create a pipeline with the given pipeline options and measure the generation performance.'''
+    logging.basicConfig(level=logging.INFO)
+    llm_manager = LlmManager(backend=create_backend(args.backend))
+    llm_manager.active_model_id = args.model
+    llm_manager.active_compression_variant = args.compression
+    if args.device:
+        llm_manager.set_device(args.device)
+    for name, value in options.items():
+        llm_manager.set_pipeline_option(name, value)
+
+    model_path = llm_manager.convert_and_compress_model()
+    start_time = time.perf_counter()
+    pipe = llm_manager.create_pipeline(model_path)
+    load_time = time.perf_counter() - start_time
+    if not pipe:
+        results["error"] = "Failed to create pipeline."
+        return
+
+    generation_config = ov_genai.GenerationConfig()
+    generation_config.max_new_tokens = args.max_new_tokens
+    # Warm-up generation to exclude kernel compilation from the measurements
+    pipe.generate(benchmark_prompt, generation_config)
+
+    throughputs = []
+    ttfts = []
+    for _ in range(args.iterations):
+        perf_metrics = pipe.generate([benchmark_prompt], generation_config).perf_metrics
+        throughputs.append(perf_metrics.get_throughput().mean)
+        ttfts.append(perf_metrics.get_ttft().mean)
+
+    results["load_time"] = load_time
+    results["throughput"] = sum(throughputs) / len(throughputs)
+    results["ttft"] = sum(ttfts) / len(ttfts)
+    results["peak_memory"] = get_peak_memory_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LlmManager pipeline options.")
+    parser.add_argument("--model", default="DeepSeek-R1-Distill-Qwen-1.5B")
+    parser.add_argument("--compression", default="INT4")
+    parser.add_argument("--device", default="")
+    parser.add_argument("--backend", default="openvino", choices=["openvino", "sim"])
+    parser.add_argument("--max-new-tokens", type=int, default=256)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--settings", nargs="*", default=list(benchmark_settings), choices=list(benchmark_settings))
+    args = parser.parse_args()
+
+    manager = multiprocessing.Manager()
+    report = []
+    for setting in args.settings:
+        logging.info(f"Benchmarking setting: {setting} {benchmark_settings[setting]}")
+        results = manager.dict()
+        process = multiprocessing.Process(target=run_setting, args=(args, benchmark_settings[setting], results))
+        process.start()
+        process.join()
+        if process.exitcode != 0 or "error" in results:
+            logging.error(f"Setting {setting} failed: {results.get('error', f'exit code {process.exitcode}')}")
+            continue
+        report.append((setting, dict(results)))
+
+    print(f"\n{'Setting':<24}{'Load, s':>10}{'TTFT, ms':>12}{'Tokens/s':>12}{'Peak memory, MB':>18}")
+    for setting, results in report:
+        peak_memory = f"{results['peak_memory']:.0f}" if results["peak_memory"] is not None else "n/a"
+        print(f"{setting:<24}{results['load_time']:>10.2f}{results['ttft']:>12.1f}"
+              f"{results['throughput']:>12.2f}{peak_memory:>18}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,75 @@
+'''
+This script benchmarks the continuous batching engine of the LlmManager.
+For every concurrency level it submits several requests per sequence slot and reports
+the aggregate throughput and the mean time to first token.
+'''
+
+import argparse
+import logging
+import time
+
+from Managers.llm_manager import LlmManager
+from Managers.llm_backends import create_backend
+import openvino_genai as ov_genai
+
+benchmark_prompts = [
+    "Tell me about planet Mars.",
+    "How much is ln(5)?",
+    "Solve the equation 2x^2 + 3x - 100 = 0. Accuracy 0.01.",
+    "Explain the difference between a list and a tuple in Python.",
+]
+
+
+def run_concurrency_level(engine, concurrency, requests_per_sequence, generation_config):
+    '''Generate the requests with the given number of concurrent sequences and measure the performance.'''
+    engine.max_concurrent_sequences = concurrency
+    start_time = time.perf_counter()
+    streams = [engine.submit(benchmark_prompts[i % len(benchmark_prompts)], generation_config)
+               for i in range(concurrency * requests_per_sequence)]
+    generated_tokens = engine.get_stats()["generated_tokens"]
+    for stream in streams:
+        stream.result()
+    elapsed = time.perf_counter() - start_time
+    generated_tokens = engine.get_stats()["generated_tokens"] - generated_tokens
+    ttfts = [stream.get_ttft() for stream in streams]
+    return generated_tokens / elapsed, sum(ttfts) / len(ttfts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LlmManager continuous batching engine.")
+    parser.add_argument("--model", default="DeepSeek-R1-Distill-Qwen-1.5B")
+    parser.add_argument("--compression", default="INT4")
+    parser.add_argument("--device", default="")
+    parser.add_argument("--backend", default="openvino", choices=["openvino", "sim"])
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 2, 4, 8])
+    parser.add_argument("--requests-per-sequence", type=int, default=2)
+    args = parser.parse_args()
+
+    llm_manager = LlmManager(backend=create_backend(args.backend))
+    llm_manager.active_model_id = args.model
+    llm_manager.active_compression_variant = args.compression
+    if args.device:
+        llm_manager.set_device(args.device)
+    llm_manager.set_engine_mode(True, max(args.concurrency))
+
+    engine = llm_manager.create_engine(llm_manager.convert_and_compress_model())
+    if not engine:
+        logging.error("Failed to create engine.")
+        return
+
+    generation_config = ov_genai.GenerationConfig()
+    generation_config.max_new_tokens = args.max_new_tokens
+    # Warm-up request to exclude kernel compilation from the measurements
+    engine.submit(benchmark_prompts[0], generation_config).result()
+
+    print(f"\n{'Concurrency':>12}{'Tokens/s':>12}{'Mean TTFT, ms':>16}")
+    for concurrency in args.concurrency:
+        tokens_per_second, ttft = run_concurrency_level(engine, concurrency, args.requests_per_sequence, generation_config)
+        print(f"{concurrency:>12}{tokens_per_second:>12.2f}{ttft:>16.1f}")
+    engine.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
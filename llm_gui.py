@@ -1,22 +1,42 @@
 import sys
 import logging
 import os
+import argparse
 from pathlib import Path
 from Managers.llm_manager import LlmManager
+from Managers.llm_backends import create_backend
 
 ## Qt should be imported after openvino_genai to avoid conflicts
 import PyQt5.QtWidgets
 from Gui.llm_setup_window import LlmSetuWindow
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="LLM GUI application.")
+    parser.add_argument("--backend", default="openvino", choices=["openvino", "sim"],
+                        help="Inference backend. 'sim' simulates the SIM device without a model.")
+    parser.add_argument("--sim-prefill-latency", type=float, default=0.0005, help="Simulated prefill latency per prompt token, s.")
+    parser.add_argument("--sim-decode-latency", type=float, default=0.02, help="Simulated latency per generated token, s.")
+    parser.add_argument("--sim-jitter", type=float, default=0.0, help="Simulated relative latency jitter.")
+    parser.add_argument("--sim-failure-rate", type=float, default=0.0, help="Probability of a simulated generation failure.")
+    # Qt arguments are passed through to QApplication
+    return parser.parse_known_args()
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     logging.info("Starting LLM GUI application...")
+    args, qt_args = parse_args()
 
     # Initialize the LLM manager
-    llm_manager = LlmManager()
+    if args.backend == "sim":
+        backend = create_backend("sim", prefill_latency_per_token=args.sim_prefill_latency,
+                                 decode_latency=args.sim_decode_latency, jitter=args.sim_jitter,
+                                 failure_rate=args.sim_failure_rate)
+    else:
+        backend = create_backend(args.backend)
+    llm_manager = LlmManager(backend=backend)
 
     # Create the main window
-    app = PyQt5.QtWidgets.QApplication(sys.argv)
+    app = PyQt5.QtWidgets.QApplication(sys.argv[:1] + qt_args)
     main_window = LlmSetuWindow(llm_manamer=llm_manager)
     main_window.show()
 
@@ -23,4 +23,53 @@ def test_llm_manager_initialization():
     assert 0 <= llm_manager.temperature <= 1
     
     logging.info("LlmManager initialized successfully.")
-    
\ No newline at end of file
+    
+
+def test_llm_manager_pipeline_options():
+    llm_manager = LlmManager()
+    assert llm_manager.get_pipeline_properties() == {}
+
+    llm_manager.set_pipeline_option("kv_cache_precision", "u8")
+    llm_manager.set_pipeline_option("dynamic_quantization_group_size", 32)
+    llm_manager.set_pipeline_option("kv_cache_precision", "int3")  # invalid, ignored
+    llm_manager.set_pipeline_option("cache_size", -1)  # invalid, ignored
+    llm_manager.set_pipeline_option("dynamic_quantization_group_size", -2)  # invalid, ignored
+    properties = llm_manager.get_pipeline_properties()
+    assert properties["KV_CACHE_PRECISION"] == "u8"
+    assert properties["DYNAMIC_QUANTIZATION_GROUP_SIZE"] == 32
+    assert "scheduler_config" not in properties
+
+    # 0 disables dynamic quantization, -1 keeps the OpenVINO default
+    llm_manager.set_pipeline_option("dynamic_quantization_group_size", 0)
+    assert llm_manager.get_pipeline_properties()["DYNAMIC_QUANTIZATION_GROUP_SIZE"] == 0
+    llm_manager.set_pipeline_option("dynamic_quantization_group_size", -1)
+    assert "DYNAMIC_QUANTIZATION_GROUP_SIZE" not in llm_manager.get_pipeline_properties()
+
+    llm_manager.set_pipeline_option("cache_size", 2)
+    llm_manager.set_pipeline_option("max_num_seqs", 4)
+    llm_manager.set_pipeline_option("enable_prefix_caching", True)
+    scheduler_config = llm_manager.get_pipeline_properties()["scheduler_config"]
+    assert scheduler_config.cache_size == 2
+    assert scheduler_config.max_num_seqs == 4
+    assert scheduler_config.enable_prefix_caching
+
+
+def test_llm_manager_profiles(tmp_path):
+    llm_manager = LlmManager()
+    llm_manager.profiles_path = tmp_path / "llm_profiles.json"
+    assert not llm_manager.load_profile()
+
+    llm_manager.active_compression_variant = "INT8"
+    llm_manager.set_temperature(0.3)
+    llm_manager.set_pipeline_option("kv_cache_precision", "f16")
+    llm_manager.save_profile()
+
+    other_manager = LlmManager()
+    other_manager.profiles_path = llm_manager.profiles_path
+    assert other_manager.load_profile()
+    assert other_manager.active_compression_variant == "INT8"
+    assert other_manager.temperature == 0.3
+    assert other_manager.pipeline_options["kv_cache_precision"] == "f16"
+
+    assert not other_manager.load_profile("DeepSeek-R1-Distill-Qwen-7B")
+    assert other_manager.pipeline_options["kv_cache_precision"] == "default"
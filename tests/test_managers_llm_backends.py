@@ -0,0 +1,74 @@
+import sys
+import logging
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+if test_path not in sys.path:
+    sys.path.append(test_path)
+
+from Managers.llm_backends import LlmBackend, SimulatedBackend, create_backend
+from Managers.llm_manager import LlmManager
+from openvino_genai import GenerationConfig
+
+
+def test_create_backend():
+    assert isinstance(create_backend("sim"), SimulatedBackend)
+    with pytest.raises(ValueError):
+        create_backend("unknown")
+
+
+def test_incomplete_backend_fails_on_creation():
+    class DevicesOnlyBackend(LlmBackend):
+        def get_devices(self):
+            return ["CPU"]
+
+    with pytest.raises(TypeError):
+        DevicesOnlyBackend()
+
+
+def test_llm_manager_with_simulated_backend():
+    llm_manager = LlmManager(backend=SimulatedBackend(decode_latency=0.0))
+    assert llm_manager.available_devices == ["SIM"]
+    assert llm_manager.device == "SIM"
+
+    model_path = llm_manager.convert_and_compress_model()
+    assert llm_manager.model_exists(model_path)
+    assert llm_manager.get_model_size(model_path) == 0.0
+
+    pipe = llm_manager.create_pipeline(model_path)
+    assert pipe.generate("Hello", GenerationConfig(max_new_tokens=3)) == "token0 token1 token2 "
+
+
+def test_simulated_prefill_scales_with_prompt_length():
+    pipe = SimulatedBackend(prefill_latency_per_token=0.001, decode_latency=0.0).create_pipeline(Path("model"), "SIM", {})
+
+    short_ttft = pipe.generate(["word " * 10], GenerationConfig(max_new_tokens=1)).perf_metrics.get_ttft().mean
+    long_ttft = pipe.generate(["word " * 200], GenerationConfig(max_new_tokens=1)).perf_metrics.get_ttft().mean
+    assert short_ttft < long_ttft
+    assert long_ttft >= 200
+
+
+def test_simulated_decode_latency_and_streamer():
+    pipe = SimulatedBackend(prefill_latency_per_token=0.0, decode_latency=0.01).create_pipeline(Path("model"), "SIM", {})
+
+    start_time = time.perf_counter()
+    results = pipe.generate(["Hello"], GenerationConfig(max_new_tokens=6))
+    assert time.perf_counter() - start_time >= 0.05
+    assert results.perf_metrics.get_num_generated_tokens() == 6
+
+    streamed = []
+    text = pipe.generate("Hello", GenerationConfig(max_new_tokens=6), lambda subword: streamed.append(subword) or len(streamed) == 2)
+    assert streamed == ["token0 ", "token1 "]
+    assert text == "token0 token1 "
+
+
+def test_simulated_failure_injection():
+    pipe = SimulatedBackend(decode_latency=0.0, failure_rate=1.0).create_pipeline(Path("model"), "SIM", {})
+    with pytest.raises(RuntimeError):
+        pipe.generate("Hello", GenerationConfig(max_new_tokens=1))
+
+    assert SimulatedBackend().create_pipeline(Path("model"), "CPU", {}) is None
@@ -0,0 +1,130 @@
+import sys
+import logging
+import os
+import threading
+
+import pytest
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+if test_path not in sys.path:
+    sys.path.append(test_path)
+
+from Managers.llm_backends import SimulatedBackend
+from Managers.llm_manager import LlmManager
+from Managers.prompt_prefix_manager import PromptPrefixManager
+from openvino_genai import GenerationConfig
+
+
+class ByteTokenizer:
+    '''Tokenizer with one UTF-8 byte per token, so characters span several tokens.'''
+    def __init__(self, text):
+        self.text_bytes = text.encode("utf-8")
+        self.decoded_lengths = []
+
+    def decode(self, token_ids):
+        self.decoded_lengths.append(len(token_ids))
+        return bytes(self.text_bytes[token_id] for token_id in token_ids).decode("utf-8", errors="replace")
+
+
+def create_engine(max_concurrent_sequences, **backend_args):
+    llm_manager = LlmManager(backend=SimulatedBackend(**backend_args))
+    llm_manager.set_engine_mode(True, max_concurrent_sequences)
+    return llm_manager.create_engine(llm_manager.convert_and_compress_model())
+
+
+def test_engine_streams_concurrent_requests():
+    engine = create_engine(4, prefill_latency_per_token=0.0, decode_latency=0.001)
+    streams = [engine.submit(f"Question {i}", GenerationConfig(max_new_tokens=5)) for i in range(6)]
+
+    chunks = []
+    thread = threading.Thread(target=lambda: chunks.extend(streams[0]))
+    thread.start()
+    thread.join(timeout=10)
+    assert "".join(chunks) == "token0 token1 token2 token3 token4 "
+    for stream in streams:
+        assert stream.result(timeout=10) == "token0 token1 token2 token3 token4 "
+        assert stream.get_ttft() is not None
+
+    stats = engine.get_stats()
+    assert stats["completed_requests"] == 6
+    assert stats["generated_tokens"] == 30
+    engine.stop()
+
+
+def test_engine_priorities():
+    engine = create_engine(1, prefill_latency_per_token=0.0, decode_latency=0.005)
+    engine.aging_rate = 0.0
+    blocker = engine.submit("Blocker", GenerationConfig(max_new_tokens=20))
+    low = engine.submit("Low", GenerationConfig(max_new_tokens=1), priority=0)
+    high = engine.submit("High", GenerationConfig(max_new_tokens=1), priority=10)
+
+    blocker.result(timeout=10)
+    low.result(timeout=10)
+    high.result(timeout=10)
+    assert high.first_token_time < low.first_token_time
+    engine.stop()
+
+
+def test_engine_cancel_and_stop():
+    engine = create_engine(1, prefill_latency_per_token=0.0, decode_latency=0.005)
+    running = engine.submit("Running", GenerationConfig(max_new_tokens=1000))
+    waiting = engine.submit("Waiting", GenerationConfig(max_new_tokens=1000))
+    running.cancel()
+    assert len(running.result(timeout=10).split()) < 1000
+
+    engine.stop()
+    with pytest.raises(RuntimeError):
+        waiting.result(timeout=10)
+    with pytest.raises(RuntimeError):
+        engine.submit("After stop", GenerationConfig(max_new_tokens=1)).result(timeout=10)
+
+
+def test_engine_failure_fails_active_requests():
+    engine = create_engine(2, decode_latency=0.0, failure_rate=1.0)
+    with pytest.raises(RuntimeError):
+        engine.submit("Question", GenerationConfig(max_new_tokens=5)).result(timeout=10)
+    # The failed requests are cancelled in the pipeline
+    assert not engine.pipe.has_non_finished_requests()
+    engine.stop()
+
+
+def test_engine_batches_concurrent_requests():
+    num_steps = []
+    for concurrency in [1, 4]:
+        engine = create_engine(concurrency, prefill_latency_per_token=0.0, decode_latency=0.0)
+        streams = [engine.submit(f"Question {i}", GenerationConfig(max_new_tokens=20)) for i in range(4)]
+        for stream in streams:
+            stream.result(timeout=10)
+        assert engine.get_stats()["generated_tokens"] == 80
+        num_steps.append(engine.pipe.num_steps)
+        engine.stop()
+    # One token per request per step: sequential generation takes 4 times the steps of the batched one
+    assert num_steps == [80, 20]
+
+
+def test_engine_does_not_split_multi_token_characters():
+    text = "Ответ: 解 😀! " * 20
+    engine = create_engine(1, prefill_latency_per_token=0.0, decode_latency=0.0, response_tokens=1000)
+    engine.tokenizer = ByteTokenizer(text)
+    stream = engine.submit("Question", GenerationConfig(max_new_tokens=len(text.encode("utf-8"))))
+    chunks = list(stream)
+    assert "".join(chunks) == text
+    assert not any("\ufffd" in chunk for chunk in chunks)
+    # Only the tail of the response is decoded, at most two 4-byte characters
+    assert max(engine.tokenizer.decoded_lengths) <= 8
+    engine.stop()
+
+
+def test_engine_prompt_prefix_warm_up(tmp_path):
+    llm_manager = LlmManager(backend=SimulatedBackend(prefill_latency_per_token=0.002, decode_latency=0.0))
+    llm_manager.prefix_manager = PromptPrefixManager(tmp_path / "prefixes.json")
+    llm_manager.prefix_manager.add_prefix("long", "Think step by step. " * 50)
+    llm_manager.set_active_prefix("long")
+    llm_manager.set_pipeline_option("enable_prefix_caching", True)
+    llm_manager.set_engine_mode(True)
+    model_path = llm_manager.convert_and_compress_model()
+    engine = llm_manager.create_engine(model_path)
+
+    ttft_record = llm_manager.warm_up_engine_prefix(engine, model_path)
+    assert ttft_record["ttft_warm_ms"] < ttft_record["ttft_cold_ms"] / 2
+    engine.stop()
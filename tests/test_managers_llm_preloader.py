@@ -0,0 +1,137 @@
+import sys
+import logging
+import os
+import time
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+if test_path not in sys.path:
+    sys.path.append(test_path)
+
+from Managers.llm_backends import SimulatedBackend
+from Managers.llm_manager import LlmManager
+from Managers.prompt_prefix_manager import PromptPrefixManager
+from Managers.llm_preloader import LlmPreloader, PRELOAD_READY, PRELOAD_CANCELLED, PRELOAD_NOT_AVAILABLE
+
+
+class NotConvertedBackend(SimulatedBackend):
+    def model_exists(self, model_path):
+        return False
+
+
+def wait_for_preload(preloader, timeout=10):
+    end_time = time.perf_counter() + timeout
+    while preloader.is_running() and time.perf_counter() < end_time:
+        time.sleep(0.01)
+
+
+def create_manager(tmp_path, backend):
+    llm_manager = LlmManager(backend=backend)
+    llm_manager.profiles_path = tmp_path / "llm_profiles.json"
+    return llm_manager
+
+
+def test_last_used_model(tmp_path):
+    llm_manager = create_manager(tmp_path, SimulatedBackend())
+    assert llm_manager.get_last_used_model() is None
+    llm_manager.active_model_id = "DeepSeek-R1-Distill-Qwen-7B"
+    llm_manager.save_profile()
+    assert llm_manager.get_last_used_model() == "DeepSeek-R1-Distill-Qwen-7B"
+
+
+def test_preload_pipeline(tmp_path):
+    llm_manager = create_manager(tmp_path, SimulatedBackend(decode_latency=0.001))
+    preloader = LlmPreloader(llm_manager)
+    preloader.start()
+    wait_for_preload(preloader)
+    assert preloader.status == PRELOAD_READY
+    assert preloader.matches(llm_manager.get_selection())
+
+    llm_manager.set_pipeline_option("kv_cache_precision", "u8")
+    assert not preloader.matches(llm_manager.get_selection())
+
+    model_path, pipe, engine = preloader.take()
+    assert model_path == llm_manager.get_model_path()
+    assert pipe is not None and engine is None
+    assert preloader.take() == (None, None, None)
+
+
+def test_preload_last_used_model(tmp_path):
+    llm_manager = create_manager(tmp_path, SimulatedBackend(decode_latency=0.001))
+    llm_manager.active_model_id = "DeepSeek-R1-Distill-Qwen-7B"
+    llm_manager.set_pipeline_option("kv_cache_precision", "u8")
+    llm_manager.save_profile()
+
+    # At launch the profile of the last-used model is loaded into a new manager
+    llm_manager = create_manager(tmp_path, SimulatedBackend(decode_latency=0.001))
+    llm_manager.load_profile(llm_manager.get_last_used_model())
+    assert llm_manager.active_model_id == "DeepSeek-R1-Distill-Qwen-7B"
+    preloader = LlmPreloader(llm_manager)
+    preloader.start()
+    wait_for_preload(preloader)
+    assert preloader.selection["model_id"] == "DeepSeek-R1-Distill-Qwen-7B"
+    assert preloader.selection["pipeline_options"]["kv_cache_precision"] == "u8"
+    assert preloader.matches(llm_manager.get_selection())
+    model_path, _, _ = preloader.take()
+    assert model_path == llm_manager.get_model_path("DeepSeek-R1-Distill-Qwen-7B")
+
+
+def test_preload_engine(tmp_path):
+    llm_manager = create_manager(tmp_path, SimulatedBackend(decode_latency=0.001))
+    llm_manager.set_engine_mode(True, 2)
+    preloader = LlmPreloader(llm_manager)
+    preloader.start()
+    wait_for_preload(preloader)
+    _, pipe, engine = preloader.take()
+    assert pipe is None
+    assert engine.get_stats()["completed_requests"] == 1
+    engine.stop()
+
+
+def test_preload_prompt_prefix_ttft(tmp_path):
+    llm_manager = create_manager(tmp_path, SimulatedBackend(decode_latency=0.001))
+    llm_manager.prefix_manager = PromptPrefixManager(tmp_path / "prefixes.json")
+    llm_manager.prefix_manager.add_prefix("short", "Answer briefly.")
+    llm_manager.set_active_prefix("short")
+    llm_manager.set_pipeline_option("enable_prefix_caching", True)
+    llm_manager.set_engine_mode(True)
+    preloader = LlmPreloader(llm_manager)
+    preloader.start()
+    wait_for_preload(preloader)
+    assert preloader.prefix_ttft_record is not None
+
+    # The preload thread does not change the prefix store, the TTFT is recorded by the owner
+    record_key = llm_manager.get_ttft_record_key(llm_manager.get_model_path())
+    assert llm_manager.prefix_manager.get_ttft_record("short", record_key) is None
+    assert PromptPrefixManager(tmp_path / "prefixes.json").get_ttft_record("short", record_key) is None
+
+    model_path, _, engine = preloader.take()
+    preloader.record_prefix_ttft(llm_manager, model_path)
+    assert PromptPrefixManager(tmp_path / "prefixes.json").get_ttft_record("short", record_key) == preloader.prefix_ttft_record
+    engine.stop()
+
+
+def test_preload_not_converted_model(tmp_path):
+    preloader = LlmPreloader(create_manager(tmp_path, NotConvertedBackend()))
+    preloader.start()
+    wait_for_preload(preloader)
+    assert preloader.status == PRELOAD_NOT_AVAILABLE
+
+
+def test_preload_cancel(tmp_path):
+    llm_manager = create_manager(tmp_path, SimulatedBackend(decode_latency=0.05))
+    preloader = LlmPreloader(llm_manager)
+    preloader.start()
+    preloader.cancel()
+    wait_for_preload(preloader)
+    assert preloader.status == PRELOAD_CANCELLED
+    assert preloader.take() == (None, None, None)
+
+    # Cancel of a ready preload releases the engine
+    llm_manager.set_engine_mode(True)
+    preloader = LlmPreloader(llm_manager, warm_up_tokens=1)
+    preloader.start()
+    wait_for_preload(preloader)
+    engine = preloader.engine
+    preloader.cancel()
+    assert preloader.status == PRELOAD_CANCELLED
+    assert not engine.running
@@ -0,0 +1,66 @@
+import sys
+import logging
+import os
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+if test_path not in sys.path:
+    sys.path.append(test_path)
+
+from Managers.llm_backends import SimulatedBackend
+from Managers.llm_manager import LlmManager
+from Managers.prompt_prefix_manager import PromptPrefixManager, join_prompt
+
+
+def test_prompt_prefixes(tmp_path):
+    prefix_manager = PromptPrefixManager(tmp_path / "prefixes.json")
+    assert prefix_manager.get_prefix_names()
+
+    prefix_manager.add_prefix("math", "You are a math tutor.")
+    assert prefix_manager.build_prompt("math", "2+2?") == "You are a math tutor.\n\n2+2?"
+    assert prefix_manager.build_prompt("unknown", "2+2?") == "2+2?"
+    assert join_prompt("", "2+2?") == "2+2?"
+
+    reloaded_manager = PromptPrefixManager(tmp_path / "prefixes.json")
+    assert reloaded_manager.get_prefix("math") == "You are a math tutor."
+    reloaded_manager.remove_prefix("math")
+    assert "math" not in reloaded_manager.get_prefix_names()
+
+
+def test_prompt_prefix_cache_improves_ttft(tmp_path):
+    llm_manager = LlmManager(backend=SimulatedBackend(prefill_latency_per_token=0.002, decode_latency=0.0))
+    llm_manager.prefix_manager = PromptPrefixManager(tmp_path / "prefixes.json")
+    llm_manager.prefix_manager.add_prefix("long", "Think step by step. " * 50)
+    llm_manager.set_active_prefix("long")
+    # The prompt prefix keeps the prefix caching option of the user
+    assert not llm_manager.pipeline_options["enable_prefix_caching"]
+    llm_manager.set_pipeline_option("enable_prefix_caching", True)
+
+    model_path = llm_manager.convert_and_compress_model()
+    pipe = llm_manager.create_pipeline(model_path)
+    ttft_record = llm_manager.warm_up_prefix(pipe, model_path)
+    logging.info(f"TTFT cold: {ttft_record['ttft_cold_ms']:.1f} ms, with the cached prefix: {ttft_record['ttft_warm_ms']:.1f} ms")
+    assert ttft_record["ttft_warm_ms"] < ttft_record["ttft_cold_ms"] / 2
+
+    # The TTFT record survives restarts for the same model, precision and device
+    record_key = llm_manager.get_ttft_record_key(model_path)
+    reloaded_manager = PromptPrefixManager(tmp_path / "prefixes.json")
+    assert reloaded_manager.get_ttft_record("long", record_key) == ttft_record
+
+    # With the TTFT record the warm-up only prefills the prefix once and returns the cached record
+    llm_manager.prefix_manager = reloaded_manager
+    restarted_pipe = llm_manager.create_pipeline(model_path)
+    assert llm_manager.warm_up_prefix(restarted_pipe, model_path) == ttft_record
+    assert len(restarted_pipe.cached_prompts) == 1
+
+    # Changing the prefix text invalidates the TTFT record
+    reloaded_manager.add_prefix("long", "Answer briefly.")
+    assert reloaded_manager.get_ttft_record("long", record_key) is None
+
+
+def test_unknown_prompt_prefix(tmp_path):
+    llm_manager = LlmManager(backend=SimulatedBackend(prefill_latency_per_token=0.002, decode_latency=0.0))
+    llm_manager.prefix_manager = PromptPrefixManager(tmp_path / "prefixes.json")
+    llm_manager.set_active_prefix("unknown")
+    assert llm_manager.active_prefix_name == ""
+    assert llm_manager.build_prompt("Hello") == "Hello"
+    assert llm_manager.warm_up_prefix(None, None) is None
@@ -12,3 +12,12 @@ def test_hello():
     logging.info("Hello from test_utils_model_utils!")
     assert True
     
+
+def test_get_model_hash(tmp_path):
+    (tmp_path / "openvino_model.xml").write_text("<net name='model'/>")
+    (tmp_path / "openvino_model.bin").write_bytes(b"\0" * 16)
+    model_hash = model_utils.get_model_hash(tmp_path)
+    assert model_hash == model_utils.get_model_hash(tmp_path)
+
+    (tmp_path / "openvino_model.bin").write_bytes(b"\0" * 32)
+    assert model_hash != model_utils.get_model_hash(tmp_path)